@@ -22,6 +22,16 @@
         o 27 February 2014
           Cleanup, refactoring, re-indenting.
           Fix class/instance variable mixups.
+
+        o 19 October 2026
+          Version counters on C_snode and an LRU, byte-budgeted
+          C_renderCache so that repeated tree prints only re-render
+          the branches that changed.
+          Preorder interval labels for O(1) ancestor checks.
+          Opt-in hash-consing of payloads and identical subtrees.
+          Inheritable node properties, resolved lazily through cached
+          ancestor lookups.
+          Optional path compression of single-child chains.
 """
 
 # System modules
@@ -33,6 +43,11 @@ from    string                  import  *
 from    C_stringCore            import  *
 
 import  itertools
+import  collections
+import  bisect
+import  threading
+import  time
+import  weakref
 
 # from    IPython.core.debugger   import Tracer; 
 
@@ -51,6 +66,14 @@ class C_meta:
             self.sCore                  = C_stringCore()
             self._depth                 = 0
             self.str_pre                = ' '
+            self.snode_owner            = None  # the C_snode this meta describes
+
+        def version_bump(self):
+            '''
+            Signal the owning node (if any) that its meta data changed.
+            '''
+            if self.snode_owner is not None:
+                self.snode_owner.version_bump()
 
         #
         ## Getters/setters
@@ -70,8 +93,9 @@ class C_meta:
             '''
             if len(args):
                 self.l_mustInclude = args[0]
+                self.version_bump()
             else:
-                return l_mustInclude
+                return self.l_mustInclude
 
         def mustNotInclude(self, *args):
             '''
@@ -79,8 +103,9 @@ class C_meta:
             '''
             if len(args):
                 self.l_mustNotInclude = args[0]
+                self.version_bump()
             else:
-                return l_mustNotInclude
+                return self.l_mustNotInclude
 
         def canInclude(self, *args):
             '''
@@ -88,8 +113,19 @@ class C_meta:
             '''
             if len(args):
                 self.l_canInclude = args[0]
+                self.version_bump()
             else:
-                return l_canInclude
+                return self.l_canInclude
+
+        def hitCount(self, *args):
+            '''
+            Get/set the hitCount
+            '''
+            if len(args):
+                self._hitCount = args[0]
+                self.version_bump()
+            else:
+                return self._hitCount
 
         def depth(self, *args):
             '''
@@ -97,6 +133,7 @@ class C_meta:
             '''
             if len(args):
                 self._depth = args[0]
+                self.version_bump()
             else:
                 return self._depth
 
@@ -104,6 +141,7 @@ class C_meta:
         ## core overloads
 
         def __str__(self):
+            self.sCore.reset()
             self.sCore.write('%s   +--depth............ %d\n' % (self.str_pre, self._depth))
             self.sCore.write('%s   +--hitCount......... %d\n' % (self.str_pre, self._hitCount))
             self.sCore.write('%s   +--mustInclude...... %s\n' % (self.str_pre, self.l_mustInclude))
@@ -169,25 +207,82 @@ class C_snode:
             #+ each higher level.
 
             self.meta                   = C_meta()
+            self.meta.snode_owner       = self
             self.snode_parent           = None
             self.d_nodes                = {}
             self.d_data                 = {}
-            self.b_printMetaData        = True
+            self.b_printMetaData        = None  # None: as the parent node
             self.b_printContents        = True
             self.b_printPre             = False
             self.str_nodeName           = astr_nodeName
             self.b_printPre             = False
 
+            # The version counter is bumped each time this node, or any
+            #+ node below it, is mutated. It is used to decide whether a
+            #+ cached rendering of this subtree is still valid.
+            self._version               = 0
+
+            # Preorder interval labels, see C_stree.label_update(). They
+            #+ only depend on this subtree (not on where it hangs in the
+            #+ tree) and are valid while _labelVersion == _version.
+            self._size                  = 1     # nodes in this subtree
+            self.d_offset               = None  # child -> entry offset
+            self._labelVersion          = -1
+
+            # The number of places in the tree that hold this node. Nodes
+            #+ of identical subtrees are shared once C_stree.subtrees_intern()
+            #+ has run; a shared node is copied before it is mutated.
+            self._refs                  = 1
+
+            # Inheritable properties, see C_stree.prop_set(): the ones set
+            #+ on this node, and the resolved values of inherited ones,
+            #+ as key -> (stamp, value). The combined constraints of the
+            #+ ancestors are remembered likewise, see C_stree.t_constraints().
+            self.d_props                = {}
+            self.d_propCache            = {}
+            self.t_constraintCache      = None
+
+            # In a compressed tree (see C_stree.nodes_compress()) a chain
+            #+ of data-less, single-child nodes above this one is folded
+            #+ into the edge from its parent: l_edge holds the names of
+            #+ the folded nodes, top first, and the parent files this node
+            #+ under the first of them.
+            self.l_edge                 = []
+
         #
         # Getters and setters
 
         def metaData_print(self, *args):
+            '''
+            Get / set the print flag of the meta data. A flag of None (the
+            default) means this node prints as its parent does.
+            '''
             if len(args):
                 self.b_printMetaData    = args[0]
+                self.version_bump()
                 return True
             else:
                 return self.b_printMetaData
 
+        def version(self):
+            '''
+            Return the version counter of this node.
+            '''
+            return self._version
+
+        def version_bump(self):
+            '''
+            Bump the version of this node and of each node up the
+            snode_parent chain, invalidating any cached rendering of
+            the subtrees containing this node.
+            '''
+            snode       = self
+            while True:
+                snode._version += 1
+                snode_parent    = snode.snode_parent
+                if snode_parent is None or snode_parent is snode: break
+                snode           = snode_parent
+
         def depth(self, *args):
             '''
             Get/set the depth of this node.
@@ -238,6 +333,23 @@ class C_snode:
             return str_ret
 
         def __str__(self):
+            return self.str_render()
+
+        def str_render(self, acache = None, ab_printMetaData = True):
+            '''
+            Render this node (and its subtree) as a string. If a
+            C_renderCache <acache> is given, unchanged subtrees are
+            served from the cache and only the branches whose version
+            has changed since the last render are redone.
+
+            <ab_printMetaData> is the meta data print flag inherited from
+            the parent node, used unless this node sets its own.
+            '''
+            b_printMetaData = self.b_printMetaData
+            if b_printMetaData is None: b_printMetaData = ab_printMetaData
+            if acache is not None:
+                str_cached  = acache.get(self, b_printMetaData)
+                if str_cached is not None: return str_cached
             self.sCore.reset()
             str_pre     = ""
             if not self.depth():
@@ -250,7 +362,7 @@ class C_snode:
             else:
                 str_pre = " "
             self.meta.pre(str_pre)
-            if self.b_printMetaData: self.sCore.write('%s' % self.meta)
+            if b_printMetaData: self.sCore.write('%s' % self.meta)
 
             for key, value in self.d_data.iteritems():
                 self.sCore.write('%s   +--%-17s %s\n' % (str_pre, key, value))
@@ -264,14 +376,52 @@ class C_snode:
                     self.d_nodes[node].printPre(True)
                     if node == lastKey:
                         self.d_nodes[node].printPre(False)
-                    str_contents = C_snode.str_blockIndent('%s' %
-                        self.d_nodes[node], 1, 8, tabBoundary = "")
+                    str_contents = C_snode.str_blockIndent(
+                        self.d_nodes[node].str_renderEdge(acache, b_printMetaData),
+                        1, 8,
+                        tabBoundary = "")
                     # str_contents = re.sub(r'                ', 'xxxxxxxx|xxxxxxx', str_contents)
                     if self.d_nodes[node].printPre():
                         str_contents = re.sub(r'                ', '        |       ', str_contents)
                     self.sCore.write(str_contents)
                     elCount   = elCount + 1
-            return self.sCore.strget()
+            str_render  = self.sCore.strget()
+            if acache is not None: acache.put(self, str_render, b_printMetaData)
+            return str_render
+
+        def snode_edge(self, a_edge):
+            '''
+            Return a stand-alone node for the folded node <a_edge> of the
+            compressed edge above this node.
+            '''
+            snode       = C_snode(self.l_edge[a_edge])
+            snode.depth(self.depth() - len(self.l_edge) + a_edge)
+            return snode
+
+        def str_renderEdge(self, acache = None, ab_printMetaData = True,
+                           a_edge = 0):
+            '''
+            Render this node as a child of its parent: the folded nodes
+            of its compressed edge (from <a_edge> on) are rendered above
+            it, as they would be in an uncompressed tree.
+            '''
+            if a_edge == len(self.l_edge):
+                return self.str_render(acache, ab_printMetaData)
+            snode       = self.snode_edge(a_edge)
+            b_printPre  = self.b_printPre
+            snode.printPre(b_printPre)
+            str_pre     = " "
+            if b_printPre: str_pre = "|"
+            self.b_printPre             = False
+            str_render  = '%s%s   +---+\n%s' % (
+                                snode.str_render(None, ab_printMetaData),
+                                str_pre,
+                                C_snode.str_blockIndent(
+                                    self.str_renderEdge(acache, ab_printMetaData,
+                                                        a_edge + 1),
+                                    1, 8, tabBoundary = ""))
+            self.b_printPre             = b_printPre
+            return str_render
 
         #
         # Simple error handling
@@ -282,6 +432,33 @@ class C_snode:
             print("\nReturning to system with code %s\n"    % astr_code)
             sys.exit(astr_code)
 
+        def d_dump(self):
+            '''
+            Return a plain (picklable) nested dictionary describing this
+            node and its subtree. The inverse is C_stree.snode_load().
+            '''
+            return {'name':             self.str_nodeName,
+                    'data':             self.d_data,
+                    'printMetaData':    self.b_printMetaData,
+                    'props':            self.d_props,
+                    'meta':             {
+                        'hitCount':         self.meta._hitCount,
+                        'canInclude':       self.meta.l_canInclude,
+                        'mustInclude':      self.meta.l_mustInclude,
+                        'mustNotInclude':   self.meta.l_mustNotInclude},
+                    'nodes':            [self.d_nodes[node].d_dumpEdge()
+                                            for node in self.d_nodes.keys()]}
+
+        def d_dumpEdge(self, a_edge = 0):
+            '''
+            Dump this node as d_dump() does, with the folded nodes of its
+            compressed edge (from <a_edge> on) restored above it.
+            '''
+            if a_edge == len(self.l_edge): return self.d_dump()
+            d_snode             = self.snode_edge(a_edge).d_dump()
+            d_snode['nodes']    = [self.d_dumpEdge(a_edge + 1)]
+            return d_snode
+
         def node_branch(self, al_keys, al_values):
             """
             For each node in <al_values>, add to internal contents
@@ -297,6 +474,628 @@ class C_snode:
             Expands the internal md_nodes with <adict>
             """
             self.d_nodes.update(adict)
+            self.version_bump()
+
+class C_renderCache:
+        '''
+        A bounded LRU cache of rendered C_snode subtree text.
+
+        Entries are keyed on node identity (plus the print flags that
+        change the rendering) and are only served while the version
+        counter of the node matches the one recorded at render time.
+        Entries only hold weak references to their nodes, so the cache
+        does not keep alive nodes the tree has let go of (e.g. pages
+        spilled by a C_streePager). The cache is budgeted in bytes of stored text; least recently
+        used entries are dropped once the budget is exceeded.
+        '''
+
+        def __init__(self, a_maxBytes = 1 << 24):
+            self.str_obj                = 'C_renderCache'
+            self._maxBytes              = a_maxBytes
+            self._bytes                 = 0
+            self._hits                  = 0
+            self._misses                = 0
+            self.d_cache                = collections.OrderedDict()
+
+        @staticmethod
+        def key(asnode, ab_printMetaData):
+            return (id(asnode),
+                    asnode.b_printPre,
+                    ab_printMetaData,
+                    asnode.b_printContents)
+
+        def get(self, asnode, ab_printMetaData = True):
+            '''
+            Return the cached rendering of <asnode>, printed with the
+            (resolved) meta data flag <ab_printMetaData>, or None if
+            there is no valid entry.
+            '''
+            key         = C_renderCache.key(asnode, ab_printMetaData)
+            t_entry     = self.d_cache.pop(key, None)
+            if t_entry is not None:
+                if t_entry[0]() is asnode and t_entry[1] == asnode._version:
+                    # Re-insert as the most recently used entry
+                    self.d_cache[key]   = t_entry
+                    self._hits         += 1
+                    return t_entry[2]
+                self._bytes    -= len(t_entry[2])
+            self._misses       += 1
+            return None
+
+        def put(self, asnode, astr_render, ab_printMetaData = True):
+            '''
+            Store the rendering <astr_render> of <asnode>, evicting least
+            recently used entries to stay within the byte budget.
+            '''
+            size        = len(astr_render)
+            if size > self._maxBytes: return False
+            key         = C_renderCache.key(asnode, ab_printMetaData)
+            t_entry     = self.d_cache.pop(key, None)
+            if t_entry is not None: self._bytes -= len(t_entry[2])
+            self.d_cache[key]   = (weakref.ref(asnode), asnode._version,
+                                   astr_render)
+            self._bytes        += size
+            while self._bytes > self._maxBytes:
+                key, t_entry    = self.d_cache.popitem(last = False)
+                self._bytes    -= len(t_entry[2])
+            return True
+
+        def clear(self):
+            self.d_cache.clear()
+            self._bytes                 = 0
+
+        def stats(self):
+            '''
+            Return a dictionary of cache statistics.
+            '''
+            return {'entries':  len(self.d_cache),
+                    'bytes':    self._bytes,
+                    'maxBytes': self._maxBytes,
+                    'hits':     self._hits,
+                    'misses':   self._misses}
+
+class C_orderedNodes(dict):
+        '''
+        A dictionary of child C_snodes that keeps its keys in a defined
+        order, either sorted by name ('sorted') or in the order in which
+        they were added ('insertion').
+
+        Besides the normal dictionary interface (with keys(), iteration,
+        etc. following the defined order) it offers l_page(), which
+        returns a window of the keys by offset, cursor and name prefix.
+        In 'sorted' order, a page costs O(log n + page) rather than O(n).
+
+        The keys are kept in a plain list. Adding or removing a key finds
+        its place by bisection, but shifts the keys after it, which is
+        O(n) (a memmove, fast in practice); filling a node with n
+        children thus costs O(n^2) moves in all, which stays cheap up to
+        some 10^5 children per node.
+        '''
+
+        def __init__(self, astr_order = 'sorted'):
+            dict.__init__(self)
+            self.str_obj                = 'C_orderedNodes'
+            if astr_order not in ['sorted', 'insertion']:
+                self.error_exit('creating an ordered node container',
+                                'unknown order "%s"' % astr_order, 1)
+            self.str_order              = astr_order
+            self.l_keys                 = []        # keys, in order
+            self.l_seq                  = []        # 'insertion': sequence
+            self.d_seq                  = {}        #+ number of each key
+            self._seq                   = 0
+
+        #
+        # Simple error handling
+        def error_exit(self, astr_action, astr_error, astr_code):
+            print("%s: FATAL error occurred"                % self.str_obj)
+            print("While %s,"                               % astr_action)
+            print("%s"                                      % astr_error)
+            print("\nReturning to system with code %s\n"    % astr_code)
+            sys.exit(astr_code)
+
+        def key_add(self, key):
+            if self.str_order == 'sorted':
+                bisect.insort(self.l_keys, key)
+            else:
+                self._seq      += 1
+                self.d_seq[key] = self._seq
+                self.l_seq.append(self._seq)
+                self.l_keys.append(key)
+
+        def key_remove(self, key):
+            if self.str_order == 'sorted':
+                del self.l_keys[bisect.bisect_left(self.l_keys, key)]
+            else:
+                i = bisect.bisect_left(self.l_seq, self.d_seq.pop(key))
+                del self.l_seq[i]
+                del self.l_keys[i]
+
+        #
+        ## dictionary overloads
+
+        def __setitem__(self, key, value):
+            if not dict.__contains__(self, key): self.key_add(key)
+            dict.__setitem__(self, key, value)
+
+        def __delitem__(self, key):
+            dict.__delitem__(self, key)
+            self.key_remove(key)
+
+        def __iter__(self):
+            return iter(self.l_keys)
+
+        def update(self, *args, **kwargs):
+            for adict in args + (kwargs,):
+                if hasattr(adict, 'keys'):
+                    for key in adict.keys(): self[key] = adict[key]
+                else:
+                    for key, value in adict: self[key] = value
+
+        def setdefault(self, key, default = None):
+            if not dict.__contains__(self, key): self[key] = default
+            return dict.__getitem__(self, key)
+
+        def pop(self, key, *args):
+            if dict.__contains__(self, key): self.key_remove(key)
+            return dict.pop(self, key, *args)
+
+        def popitem(self):
+            if not len(self.l_keys): raise KeyError('popitem(): empty')
+            key = self.l_keys[-1]
+            return key, self.pop(key)
+
+        def clear(self):
+            dict.clear(self)
+            self.l_keys                 = []
+            self.l_seq                  = []
+            self.d_seq                  = {}
+
+        def copy(self):
+            d_copy      = C_orderedNodes(self.str_order)
+            d_copy.update(self)
+            return d_copy
+
+        def keys(self):         return self.l_keys[:]
+        def iterkeys(self):     return iter(self.l_keys)
+        def values(self):       return [self[key] for key in self.l_keys]
+        def itervalues(self):   return (self[key] for key in self.l_keys)
+        def items(self):        return [(key, self[key]) for key in self.l_keys]
+        def iteritems(self):    return ((key, self[key]) for key in self.l_keys)
+
+        def l_page(self, a_offset = 0, a_limit = None, astr_prefix = '',
+                         astr_cursor = None):
+            '''
+            Return up to <a_limit> keys, in order, starting <a_offset>
+            keys past the start of the listing (or past <astr_cursor>, the
+            last key of a previous page) and restricted to keys that
+            start with <astr_prefix>.
+
+            A cursor that is not (or no longer) a key raises KeyError.
+
+            In 'sorted' order both the cursor and the prefix are located
+            by bisection; in 'insertion' order the cursor is, but a
+            prefix has to be matched by a scan.
+            '''
+            if astr_cursor is not None and \
+               not dict.__contains__(self, astr_cursor):
+                raise KeyError(astr_cursor)
+            l_keys      = self.l_keys
+            start       = 0
+            if self.str_order == 'sorted':
+                if len(astr_prefix):
+                    start   = bisect.bisect_left(l_keys, astr_prefix)
+                if astr_cursor is not None:
+                    start   = max(start, bisect.bisect_right(l_keys, astr_cursor))
+                b_scan      = False
+            else:
+                if astr_cursor is not None:
+                    start   = bisect.bisect_right(self.l_seq,
+                                                  self.d_seq[astr_cursor])
+                b_scan      = len(astr_prefix) > 0
+            if not b_scan: start += a_offset
+            l_page      = []
+            skip        = a_offset if b_scan else 0
+            i           = start
+            while i < len(l_keys):
+                if a_limit is not None and len(l_page) >= a_limit: break
+                key     = l_keys[i]
+                i      += 1
+                if len(astr_prefix) and not key.startswith(astr_prefix):
+                    if b_scan:  continue
+                    else:       break
+                if skip:
+                    skip   -= 1
+                    continue
+                l_page.append(key)
+            return l_page
+
+class C_internPool:
+        '''
+        A pool of canonical payload values. Equal immutable values passed
+        through value_intern() come back as one shared object. With
+        <ab_freeze>, lists are first converted (recursively) to tuples so
+        that they can be shared too.
+
+        The pool counts the references to each canonical value that it
+        has handed out; value_release() gives one back, and a value is
+        let go when its last reference is.
+        '''
+
+        def __init__(self, ab_freeze = False):
+            self.str_obj                = 'C_internPool'
+            self.b_freeze               = ab_freeze
+            self.d_pool                 = {}    # key -> [canonical, refs]
+            self._lookups               = 0
+            self._hits                  = 0
+
+        @staticmethod
+        def frozen(avalue):
+            if isinstance(avalue, (list, tuple)):
+                return tuple([C_internPool.frozen(x) for x in avalue])
+            return avalue
+
+        @staticmethod
+        def key(avalue):
+            '''
+            A pool key that tells apart values that compare equal but
+            differ in type, e.g. 1, 1.0 and True. Lists get a key as well
+            (so that C_stree.t_subtreeKey() can compare them), although
+            the pool itself only holds hashable values.
+            '''
+            if isinstance(avalue, (tuple, list)):
+                return (type(avalue),
+                        tuple([C_internPool.key(x) for x in avalue]))
+            return (type(avalue), avalue)
+
+        def value_intern(self, avalue):
+            '''
+            Return the canonical object equal to <avalue>, or <avalue>
+            itself if it is new to the pool or cannot be hashed, and count
+            a reference to it.
+            '''
+            if self.b_freeze: avalue = C_internPool.frozen(avalue)
+            try:
+                hash(avalue)
+                l_entry = self.d_pool.setdefault(C_internPool.key(avalue),
+                                                 [avalue, 0])
+            except TypeError:
+                return avalue
+            l_entry[1]     += 1
+            self._lookups  += 1
+            if l_entry[0] is not avalue: self._hits += 1
+            return l_entry[0]
+
+        def value_release(self, avalue):
+            '''
+            Give back a reference to the canonical value <avalue>; other
+            values are ignored.
+            '''
+            try:
+                hash(avalue)
+                key     = C_internPool.key(avalue)
+            except TypeError:
+                return
+            l_entry     = self.d_pool.get(key)
+            if l_entry is None or l_entry[0] is not avalue: return
+            l_entry[1] -= 1
+            if l_entry[1] <= 0: del self.d_pool[key]
+
+        def b_canonical(self, avalue):
+            '''
+            Return whether <avalue> is a value held by the pool.
+            '''
+            try:
+                hash(avalue)
+                l_entry = self.d_pool.get(C_internPool.key(avalue))
+            except TypeError:
+                return False
+            return l_entry is not None and l_entry[0] is avalue
+
+        def clear(self):
+            self.d_pool                 = {}
+
+class C_streeWatch:
+        '''
+        The watch subscriptions of a C_stree.
+
+        A subscription covers a node path, and optionally the subtree
+        below it. Mutation events are queued per subscription, coalesced
+        (repeated events on the same node and key collapse into one, and
+        successive mknode events on a node merge their new names, unless
+        an rmnode at or above the node comes in between) and delivered in
+        batches, at most once per flush interval. Events held back by the
+        interval are delivered by a timer thread when it ends, so the
+        last burst of mutations is not left pending.
+
+        A callback that raises does not keep the other subscriptions
+        from their events, nor (when the delivery is made by the
+        mutation hook or the timer) the mutation and the hooks after
+        this one from completing: the error is kept, and raised by the
+        next explicit flush(), i.e. C_stree.watch_flush().
+
+        Dispatching an event costs one dictionary lookup per prefix of
+        the event path, i.e. O(depth), regardless of the number of
+        subscriptions elsewhere in the tree.
+        '''
+
+        def __init__(self, af_interval = 0.0):
+            self.str_obj                = 'C_streeWatch'
+            self.f_interval             = af_interval
+            self.f_lastFlush            = time.time()
+            self._id                    = 0
+            self.d_watch                = {}    # path -> [subscription]
+            self.d_subscription         = {}    # id -> subscription
+            self.d_pending              = collections.OrderedDict()
+                                                # id -> OrderedDict of events
+            self.d_open                 = {}    # id -> {path: key of the
+                                                #   mknode event to merge into}
+            self._key                   = 0     # unique mknode event keys
+            self.lock                   = threading.Lock()
+                                                # guards d_pending, d_open
+            self.timer                  = None  # pending flush, if any
+            self.t_error                = None  # first unreported callback
+                                                #   error (sys.exc_info())
+
+        def subscribe(self, astr_path, afunc_callback, ab_subtree = True,
+                            al_verbs = None):
+            '''
+            Add a subscription and return its id. <afunc_callback> is
+            called with a list of (str_path, str_verb, t_args) events.
+            '''
+            self._id                   += 1
+            d_sub       = {'id':        self._id,
+                           'path':      astr_path,
+                           'callback':  afunc_callback,
+                           'subtree':   ab_subtree,
+                           'verbs':     al_verbs}
+            self.d_subscription[self._id]   = d_sub
+            self.d_watch.setdefault(astr_path, []).append(d_sub)
+            return self._id
+
+        def unsubscribe(self, a_id):
+            d_sub       = self.d_subscription.pop(a_id, None)
+            if d_sub is None: return False
+            self.d_watch[d_sub['path']].remove(d_sub)
+            if not len(self.d_watch[d_sub['path']]):
+                del self.d_watch[d_sub['path']]
+            with self.lock:
+                self.d_pending.pop(a_id, None)
+                self.d_open.pop(a_id, None)
+            if not len(self.d_subscription): self.close()
+            return True
+
+        def close(self):
+            '''
+            Cancel the pending timed flush, if any. Events still pending
+            are delivered by the next flush().
+            '''
+            with self.lock:
+                if self.timer is not None: self.timer.cancel()
+                self.timer              = None
+
+        def mutation(self, astr_verb, al_path, *args):
+            '''
+            The C_stree mutation hook: queue the event, and deliver the
+            pending events if the flush interval has elapsed, or else
+            make sure that a timer will.
+            '''
+            self.lock.acquire()
+            try:
+                self.event_dispatch(astr_verb, al_path, args)
+                f_wait  = self.f_lastFlush + self.f_interval - time.time()
+                if f_wait > 0 and len(self.d_pending) and self.timer is None:
+                    self.timer          = threading.Timer(f_wait, self.flush,
+                                                          [False])
+                    self.timer.daemon   = True
+                    self.timer.start()
+            finally:
+                self.lock.release()
+            if f_wait <= 0: self.flush(False)
+
+        def event_dispatch(self, astr_verb, al_path, at_args):
+            '''
+            Queue the event for each subscription on the event path or
+            (for subtree subscriptions) on one of its ancestors. The event
+            path of an rmnode is the parent of the removed node, so the
+            subscriptions on the removed node and below it, which are gone
+            with it, are looked up separately.
+            '''
+            str_path    = '/' + '/'.join(al_path[1:])
+            str_prefix  = '/'
+            depth       = len(al_path) - 1
+            for i in range(depth + 1):
+                if i == 1:  str_prefix  = '/' + al_path[1]
+                elif i > 1: str_prefix  = '%s/%s' % (str_prefix, al_path[i])
+                for d_sub in self.d_watch.get(str_prefix, ()):
+                    if i < depth and not d_sub['subtree']: continue
+                    if d_sub['verbs'] and astr_verb not in d_sub['verbs']:
+                        continue
+                    self.event_queue(d_sub, str_path, astr_verb, at_args)
+            if astr_verb == 'rmnode':
+                str_removed = '%s/%s' % (str_path.rstrip('/'), at_args[0])
+                for str_watch in self.d_watch.keys():
+                    if str_watch != str_removed and \
+                       not str_watch.startswith(str_removed + '/'): continue
+                    for d_sub in self.d_watch[str_watch]:
+                        if d_sub['verbs'] and astr_verb not in d_sub['verbs']:
+                            continue
+                        self.event_queue(d_sub, str_path, astr_verb, at_args)
+
+        def event_queue(self, ad_sub, astr_path, astr_verb, at_args):
+            '''
+            Add an event to the pending events of a subscription. A
+            repeated event moves to the end, with its latest arguments.
+            An mknode event is merged into the pending mknode event of
+            the node, in place; an rmnode closes the pending mknode events
+            of its parent and of the removed subtree to merging, so that
+            no name is delivered after its removal.
+            '''
+            d_events    = self.d_pending.get(ad_sub['id'])
+            if d_events is None:
+                d_events = self.d_pending[ad_sub['id']] = collections.OrderedDict()
+            d_open      = self.d_open.setdefault(ad_sub['id'], {})
+            if astr_verb == 'mknode':
+                key     = d_open.get(astr_path)
+                if key is not None:
+                    l_names = d_events[key][2][0]
+                    d_events[key] = (astr_path, astr_verb,
+                                     (l_names + [node for node in at_args[0]
+                                                 if node not in l_names],))
+                    return
+                self._key          += 1
+                key     = d_open[astr_path] = (astr_path, astr_verb, self._key)
+            elif astr_verb in ['touch', 'rmnode']:
+                key     = (astr_path, astr_verb, at_args[0])
+            else:
+                key     = (astr_path, astr_verb)
+            if astr_verb == 'rmnode':
+                str_removed = '%s/%s' % (astr_path.rstrip('/'), at_args[0])
+                for str_open in d_open.keys():
+                    if str_open == astr_path or str_open == str_removed or \
+                       str_open.startswith(str_removed + '/'):
+                        del d_open[str_open]
+            d_events.pop(key, None)
+            d_events[key]   = (astr_path, astr_verb, at_args)
+
+        def flush(self, ab_raise = True):
+            '''
+            Deliver all pending events. A callback that raises does not
+            keep the other subscriptions from their events. The first
+            error is kept and, if <ab_raise>, raised again once all are
+            delivered; the mutation hook and the timer flush without
+            raising, and leave the error to the next explicit flush().
+            '''
+            with self.lock:
+                if self.timer is not None: self.timer.cancel()
+                self.timer              = None
+                self.f_lastFlush        = time.time()
+                d_pending               = self.d_pending
+                self.d_pending          = collections.OrderedDict()
+                self.d_open             = {}
+            for sub_id, d_events in d_pending.iteritems():
+                d_sub   = self.d_subscription.get(sub_id)
+                if d_sub is None: continue
+                try:
+                    d_sub['callback'](d_events.values())
+                except Exception:
+                    with self.lock:
+                        if self.t_error is None: self.t_error = sys.exc_info()
+            if not ab_raise: return
+            with self.lock:
+                t_error                 = self.t_error
+                self.t_error            = None
+            if t_error is not None:
+                raise t_error[0], t_error[1], t_error[2]
+
+class C_streeBatch:
+        '''
+        A transaction on a C_stree, see C_stree.batch().
+        '''
+
+        def __init__(self, astree):
+            self.str_obj                = 'C_streeBatch'
+            self.stree                  = astree
+            self.b_outer                = False
+            self.l_paths                = []    # paths added by the batch
+            self.s_paths                = set()
+            self.l_events               = []    # held back mutation events
+            self.l_undo                 = []    # undo log, in order
+
+        def __enter__(self):
+            self.stree.lock.acquire()
+            if self.stree.batch_current is None:
+                self.b_outer            = True
+                self.l_cwd              = self.stree.l_cwd[:]
+                self.snode_cwd          = self.stree.snode_current
+                self.stree.batch_current = self
+            return self
+
+        def __exit__(self, a_type, a_value, a_traceback):
+            try:
+                if self.b_outer:
+                    if a_type is None:
+                        self.stree.batch_current    = None
+                        self.commit()
+                    else:
+                        self.rollback()
+                        self.stree.batch_current    = None
+                    # The pager holds off paging out while a batch is
+                    #+ open; catch up now that it is closed.
+                    if self.stree.pager is not None:
+                        self.stree.pager.enforce()
+            finally:
+                self.stree.lock.release()
+            return False
+
+        def commit(self):
+            '''
+            Merge the new paths into the path index and pass the held
+            back events to the mutation hooks. While they are passed, the
+            tree is ahead of the hooks by the events still to come, see
+            C_stree._eventsAhead.
+            '''
+            self.stree.l_allPaths.extend(self.l_paths)
+            self.stree.s_allPaths.update(self.s_paths)
+            try:
+                for i, (str_verb, l_path, t_args) in enumerate(self.l_events):
+                    self.stree._eventsAhead = len(self.l_events) - i - 1
+                    self.stree.mutation_notify(str_verb, l_path, *t_args)
+            finally:
+                self.stree._eventsAhead     = 0
+
+        def rollback(self):
+            '''
+            Undo the mutations of the batch, newest first.
+            '''
+            for t_undo in reversed(self.l_undo):
+                str_op  = t_undo[0]
+                if str_op == 'mknode':
+                    snode, l_nodes      = t_undo[1:]
+                    for node in l_nodes: del snode.d_nodes[node]
+                    snode.version_bump()
+                elif str_op == 'touch':
+                    snode, name, b_had, old = t_undo[1:]
+                    pool    = self.stree.pool_intern
+                    if pool is not None:
+                        pool.value_release(snode.d_data[name])
+                        if b_had: old   = pool.value_intern(old)
+                    if b_had:   snode.d_data[name]  = old
+                    else:       del snode.d_data[name]
+                    snode.version_bump()
+                elif str_op == 'attr':
+                    obj, str_attr, old  = t_undo[1:]
+                    setattr(obj, str_attr, old)
+                    if isinstance(obj, C_meta): self.stree.constraint_bump()
+                    if hasattr(obj, 'version_bump'): obj.version_bump()
+                elif str_op == 'prop':
+                    snode, key, b_had, old  = t_undo[1:]
+                    if b_had:   snode.d_props[key]  = old
+                    else:       snode.d_props.pop(key, None)
+                    self.stree.prop_bump(key)
+                    snode.version_bump()
+                elif str_op == 'rmnode':
+                    snode, name, snode_child, l_removed = t_undo[1:]
+                    snode.d_nodes[name] = snode_child
+                    self.stree.snode_ref(snode_child)
+                    snode.version_bump()
+                    # Added back rather than restored from a copy, so as
+                    #+ not to lose the paths of pages paged in since.
+                    self.stree.l_allPaths.extend(l_removed)
+                    self.stree.s_allPaths.update([tuple(l_path)
+                                                  for l_path in l_removed])
+                elif str_op == 'unshare':
+                    snode_parent, name, snode   = t_undo[1:]
+                    snode_copy  = snode_parent.d_nodes[name]
+                    for child in snode_copy.d_nodes.values():
+                        child._refs    -= 1
+                    if self.stree.pool_intern is not None:
+                        for value in snode_copy.d_data.values():
+                            self.stree.pool_intern.value_release(value)
+                    snode_parent.d_nodes[name]  = snode
+                    snode._refs        += 1
+                    snode_parent.version_bump()
+            self.stree.l_cwd            = self.l_cwd
+            self.stree.snode_current    = self.snode_cwd
 
 class C_snodeBranch:
         """
@@ -387,10 +1186,18 @@ class C_stree:
             else:
                 return self.b_printMetaData
 
-        def __init__(self, al_rootBranch=[]):
+        def __init__(self, al_rootBranch=[], **kwargs):
             """
             Creates a tree structure and populates the "root"
             branch.
+
+            Optional kwargs:
+
+                childOrder = None | 'sorted' | 'insertion'
+
+            With a <childOrder>, the children of every node are held in a
+            C_orderedNodes container, so that listings are ordered and
+            can be paged cheaply.
             """
             #
             # Member variables
@@ -406,11 +1213,50 @@ class C_stree:
                                                         #       object
             self._warnings              = 0;            # show warnings
             self.b_printMetaData        = False
+            self.lstr_preorderPaths     = []            # Cached preorder listing
+            self._preorderVersion       = -1            #+ and the root version
+                                                        #+ it was built for.
+            self.cache_render           = None          # Optional C_renderCache
+                                                        #+ used by the tree
+                                                        #+ printing methods.
+
+            self.str_childOrder         = None          # None, 'sorted' or
+                                                        #+ 'insertion'
+            for key, val in kwargs.iteritems():
+                if key == 'childOrder': self.str_childOrder = val
+
+            self.lock                   = threading.RLock() # Serializes users
+                                                        #+ sharing this tree across
+                                                        #+ threads, e.g. a server.
+            self.l_mutationHook         = []            # Callables notified of
+                                                        #+ each tree mutation, see
+                                                        #+ mutation_notify().
+            self.watch_registry         = None          # C_streeWatch, created
+                                                        #+ by the first watch().
+            self.pool_intern            = None          # C_internPool, see
+                                                        #+ intern_enable().
+            self.b_shared               = False         # True once subtrees
+                                                        #+ have been shared.
+            self.pager                  = None          # C_streePager, if the
+                                                        #+ tree is paged.
 
             self.l_allPaths             = []            # Each time a new C_snode is
                                                         #+ added to the tree, its path
                                                         #+ list is appended to this
                                                         #+ list variable.
+            self.s_allPaths             = set()         # l_allPaths as a set of
+                                                        #+ tuples, for b_pathOK().
+            self.batch_current          = None          # Open C_streeBatch
+            self._eventsAhead           = 0             # Mutations already
+                                                        #+ applied but not yet
+                                                        #+ passed to the hooks,
+                                                        #+ see mutation_notify().
+            self.d_propStamp            = {}            # property -> stamp of
+                                                        #+ its cached values,
+                                                        #+ see prop_get().
+            self._constraintStamp       = 0             # Stamp of the cached
+                                                        #+ ancestor constraints,
+                                                        #+ see t_constraints().
             if not len(al_rootBranch):
                 al_rootBranch           = ['/']
             if len(al_rootBranch):
@@ -424,6 +1270,7 @@ class C_stree:
             self.snode_root             = self.sbranch_root.dict_branch[str_treeRoot]
             self.snode_root.depth(0)
             self.snode_root.snode_parent = self.snode_root
+            self.snode_root.d_nodes     = self.d_nodesNew()
             self.root()
             self.l_allPaths             = self.l_cwd[:]
             if len(al_rootBranch) and al_rootBranch != ['/']:
@@ -431,9 +1278,692 @@ class C_stree:
 
         def __str__(self):
             self.sCore.reset()
-            self.sCore.write('%s' % self.snode_root)
+            self.sCore.write(self.snode_root.str_render(self.cache_render))
             return self.sCore.strget()
 
+        def renderCache(self, *args):
+            '''
+            Get / set the render cache. Setting a byte budget enables a
+            C_renderCache of that size; setting 0 or None disables it.
+            '''
+            if len(args):
+                if args[0]: self.cache_render   = C_renderCache(args[0])
+                else:       self.cache_render   = None
+                return True
+            else:
+                return self.cache_render
+
+        def mutationHook_add(self, afunc_hook):
+            '''
+            Register <afunc_hook> to be called after each mutation of the
+            tree as
+
+                afunc_hook(astr_verb, al_path, *args)
+
+            where <astr_verb> is the name of the C_stree method that was
+            called, <al_path> the (absolute) path list of the node it was
+            applied to, and <args> the arguments it was called with.
+            Calling the method <astr_verb> with <args> at <al_path> on an
+            equal tree reproduces the mutation, except for
+            'treeNode_metaSet', whose only argument is the flag the node
+            was set to.
+            '''
+            self.l_mutationHook.append(afunc_hook)
+
+        def mutationHook_remove(self, afunc_hook):
+            if afunc_hook in self.l_mutationHook:
+                self.l_mutationHook.remove(afunc_hook)
+
+        def mutation_notify(self, astr_verb, al_path, *args):
+            '''
+            Pass a mutation event to each registered hook. Inside a batch,
+            events are held back until the batch commits; while the commit
+            passes them on, self._eventsAhead is the number of them still
+            to come, whose mutations the tree already shows.
+            '''
+            if self.batch_current is not None:
+                self.batch_current.l_events.append((astr_verb, al_path, args))
+                return
+            for func_hook in self.l_mutationHook:
+                func_hook(astr_verb, al_path, *args)
+
+        #
+        # Hash-consing
+        #
+        # With intern_enable(), touch() passes its payloads through a
+        # C_internPool so that equal values are stored once, and
+        # subtrees_intern() replaces structurally identical subtrees by
+        # one shared copy. Shared nodes are copied on write: before a
+        # mutation at the cwd, cow_path() gives each node on the path its
+        # own copy (children stay shared).
+
+        def intern_enable(self, **kwargs):
+            '''
+            Start interning payloads.
+
+            Optional kwargs:
+
+                freeze = True | False   store list payloads as (shared)
+                                        tuples, which cat() then returns
+                                        (default False: lists are left
+                                        as they are, and not pooled;
+                                        subtrees_intern() still shares
+                                        nodes that hold equal lists)
+
+            The pool counts the payloads stored in the tree: touch() gives
+            back the value it overwrites, and rmnode() those of the nodes
+            it removes that are not still held elsewhere (see
+            snode_unref(); in a paged tree, these wait for the next
+            subtrees_intern(), which recounts the whole pool).
+            '''
+            b_freeze    = False
+            for key, val in kwargs.iteritems():
+                if key == 'freeze':     b_freeze    = val
+            self.pool_intern            = C_internPool(b_freeze)
+
+        def subtrees_intern(self):
+            '''
+            Share identical subtrees (same names, depth, data, meta and
+            children). If intern_enable() was called, the payload pool is
+            then rebuilt from the payloads of the (remaining) nodes, so
+            that its counts are exact and values no longer stored are let
+            go. Returns the number of node references that now point at a
+            shared copy.
+            '''
+            d_canonical = {}
+            s_done      = set()
+            shared      = 0
+            l_stack     = [(self.snode_root, False)]
+            while len(l_stack):
+                snode, b_childrenDone = l_stack.pop()
+                if id(snode) in s_done: continue
+                if not b_childrenDone:
+                    l_stack.append((snode, True))
+                    for node in snode.d_nodes.keys():
+                        l_stack.append((snode.d_nodes[node], False))
+                    continue
+                s_done.add(id(snode))
+                for node in snode.d_nodes.keys():
+                    child       = snode.d_nodes[node]
+                    t_key       = self.t_subtreeKey(child)
+                    if t_key is None: continue
+                    canonical   = d_canonical.setdefault(t_key, child)
+                    if canonical is child: continue
+                    snode.d_nodes[node] = canonical
+                    canonical._refs    += 1
+                    for grandchild in child.d_nodes.values():
+                        grandchild._refs   -= 1
+                    shared     += 1
+            if self.pool_intern is not None: self.pool_rebuild()
+            if shared:
+                self.b_shared           = True
+                # Newly shared nodes now have more than one set of
+                #+ ancestors, so what they inherit is no longer fixed.
+                self.props_invalidate()
+            return shared
+
+        def pool_rebuild(self):
+            '''
+            Empty the payload pool and intern the payloads of each node of
+            the tree (once per node object) again.
+            '''
+            self.pool_intern.clear()
+            s_done      = set()
+            l_stack     = [self.snode_root]
+            while len(l_stack):
+                snode   = l_stack.pop()
+                if id(snode) in s_done: continue
+                s_done.add(id(snode))
+                for key in snode.d_data.keys():
+                    snode.d_data[key] = \
+                        self.pool_intern.value_intern(snode.d_data[key])
+                l_stack.extend(snode.d_nodes.values())
+
+        def snode_unref(self, asnode):
+            '''
+            Drop a reference to <asnode>, which leaves the tree. A node
+            that is then held nowhere gives its payloads back to the pool
+            and drops its references to its children in turn. In a paged
+            tree only <asnode> itself is counted, so as not to page in
+            what is removed.
+            '''
+            l_stack     = [asnode]
+            while len(l_stack):
+                snode   = l_stack.pop()
+                snode._refs    -= 1
+                if snode._refs > 0: continue
+                if self.pool_intern is not None:
+                    for value in snode.d_data.values():
+                        self.pool_intern.value_release(value)
+                if self.pager is None: l_stack.extend(snode.d_nodes.values())
+
+        def snode_ref(self, asnode):
+            '''
+            Add a reference to <asnode>, which (re)enters the tree: the
+            inverse of snode_unref().
+            '''
+            l_stack     = [asnode]
+            while len(l_stack):
+                snode   = l_stack.pop()
+                snode._refs    += 1
+                if snode._refs > 1: continue
+                if self.pool_intern is not None:
+                    for key in snode.d_data.keys():
+                        snode.d_data[key] = \
+                            self.pool_intern.value_intern(snode.d_data[key])
+                if self.pager is None: l_stack.extend(snode.d_nodes.values())
+
+        def t_subtreeKey(self, asnode):
+            '''
+            Return a hashable key describing <asnode>, whose children are
+            already canonical, or None if it cannot be shared.
+            '''
+            meta        = asnode.meta
+            try:
+                t_key   = (asnode.str_nodeName,
+                           asnode.depth(),
+                           asnode.b_printMetaData,
+                           asnode.b_printContents,
+                           meta._hitCount,
+                           tuple(asnode.l_edge),
+                           tuple([(key, C_internPool.key(asnode.d_props[key]))
+                                    for key in sorted(asnode.d_props.keys())]),
+                           tuple(meta.l_canInclude),
+                           tuple(meta.l_mustInclude),
+                           tuple(meta.l_mustNotInclude),
+                           tuple([(key, C_internPool.key(asnode.d_data[key]))
+                                    for key in sorted(asnode.d_data.keys())]),
+                           tuple([(node, id(asnode.d_nodes[node]))
+                                    for node in asnode.d_nodes.keys()]))
+                hash(t_key)
+            except TypeError:
+                return None
+            return t_key
+
+        def snode_unshare(self, asnode_parent, astr_name):
+            '''
+            Replace the shared child <astr_name> of <asnode_parent> by a
+            private copy, which keeps sharing its children. Returns the
+            copy.
+            '''
+            snode       = asnode_parent.d_nodes[astr_name]
+            snode_copy  = C_snode(snode.str_nodeName)
+            snode_copy.d_data                   = snode.d_data.copy()
+            if self.pool_intern is not None:
+                for key in snode_copy.d_data.keys():
+                    snode_copy.d_data[key]      = self.pool_intern.value_intern(
+                                                    snode_copy.d_data[key])
+            snode_copy.b_printMetaData          = snode.b_printMetaData
+            snode_copy.b_printContents          = snode.b_printContents
+            snode_copy.d_props                  = snode.d_props.copy()
+            snode_copy.l_edge                   = snode.l_edge
+            snode_copy.meta._hitCount           = snode.meta._hitCount
+            snode_copy.meta._depth              = snode.meta._depth
+            snode_copy.meta.l_canInclude        = snode.meta.l_canInclude
+            snode_copy.meta.l_mustInclude       = snode.meta.l_mustInclude
+            snode_copy.meta.l_mustNotInclude    = snode.meta.l_mustNotInclude
+            snode_copy.d_nodes                  = self.d_nodesNew()
+            for node in snode.d_nodes.keys():
+                snode_copy.d_nodes[node]        = snode.d_nodes[node]
+                snode.d_nodes[node]._refs      += 1
+            snode_copy.snode_parent             = asnode_parent
+            snode_copy._version                 = snode._version
+            snode_copy._size                    = snode._size
+            snode_copy.d_offset                 = snode.d_offset
+            snode_copy._labelVersion            = snode._labelVersion
+            asnode_parent.d_nodes[astr_name]    = snode_copy
+            snode._refs                        -= 1
+            self.undo_log('unshare', asnode_parent, astr_name, snode)
+            return snode_copy
+
+        def cow_path(self):
+            '''
+            Make sure each node on the path to the cwd is held in just
+            one place (and knows its parent), so that it can be mutated.
+            Returns the (possibly new) current node.
+            '''
+            if not self.b_shared: return self.snode_current
+            # Unfold any compressed edges on the way, so that each name on
+            #+ the path is a node of its own.
+            self.l_snodeChain(self.l_cwd)
+            snode       = self.snode_root
+            for node in self.l_cwd[1:]:
+                child   = snode.d_nodes[node]
+                if child._refs > 1:
+                    child   = self.snode_unshare(snode, node)
+                child.snode_parent  = snode
+                snode   = child
+            self.snode_current          = snode
+            return snode
+
+        def d_internStats(self):
+            '''
+            Return a dictionary of deduplication statistics: the number of
+            nodes in the tree and of distinct node objects, their ratio,
+            and the number of pooled payloads in the tree (a shared node
+            counting once per place it is held in), of distinct payload
+            values, and their ratio.
+            '''
+            self.label_update()
+            pool        = self.pool_intern
+            d_payloads  = {}                    # id -> payloads in subtree
+            l_stack     = [(self.snode_root, False)]
+            while len(l_stack):
+                snode, b_childrenDone = l_stack.pop()
+                if id(snode) in d_payloads: continue
+                if not b_childrenDone:
+                    l_stack.append((snode, True))
+                    l_stack.extend([(child, False)
+                                    for child in snode.d_nodes.values()])
+                    continue
+                payloads    = 0
+                if pool is not None:
+                    payloads    = len([value for value in snode.d_data.values()
+                                        if pool.b_canonical(value)])
+                for child in snode.d_nodes.values():
+                    payloads   += d_payloads[id(child)]
+                d_payloads[id(snode)]   = payloads
+            d_stats     = {'nodes':         self.snode_root._size,
+                           'distinctNodes': len(d_payloads),
+                           'nodeRatio':     float(self.snode_root._size) /
+                                            len(d_payloads)}
+            if pool is not None:
+                payloads    = d_payloads[id(self.snode_root)]
+                d_stats['payloads']         = payloads
+                d_stats['distinctPayloads'] = len(pool.d_pool)
+                d_stats['payloadRatio']     = float(payloads) / \
+                                              max(1, len(pool.d_pool))
+            return d_stats
+
+        #
+        # Path compression
+        #
+        # nodes_compress() folds each chain of data-less, single-child
+        # nodes into the edge above the first node below it that is not
+        # such a node (see C_snode.l_edge), so that long, sparse paths
+        # take one node and one hop. The folding does not show: paths,
+        # listings, printing and dumps are those of the uncompressed
+        # tree. A folded node is unfolded again as soon as a path
+        # addresses it, see l_snodeChain(), and can then be mutated as
+        # usual.
+
+        def b_foldable(self, asnode):
+            '''
+            Return whether <asnode> may be folded into a compressed edge.
+            '''
+            if asnode is self.snode_current or asnode is self.snode_root:
+                return False
+            if asnode._refs > 1 or len(asnode.d_nodes) != 1: return False
+            if asnode.d_data or asnode.d_props: return False
+            if asnode.b_printMetaData is not None or \
+               not asnode.b_printContents:
+                return False
+            meta        = asnode.meta
+            if meta._hitCount or meta.l_canInclude or \
+               meta.l_mustInclude or meta.l_mustNotInclude:
+                return False
+            return asnode.d_nodes.values()[0]._refs == 1
+
+        def nodes_compress(self):
+            '''
+            Fold the chains of data-less, single-child nodes of the tree
+            into compressed edges. Returns the number of nodes folded.
+            Paged trees and open batches are left alone.
+            '''
+            if self.pager is not None or self.batch_current is not None:
+                return 0
+            folded      = 0
+            s_done      = set()
+            l_stack     = [self.snode_root]
+            while len(l_stack):
+                snode   = l_stack.pop()
+                if id(snode) in s_done: continue
+                s_done.add(id(snode))
+                b_changed   = False
+                for node in snode.d_nodes.keys():
+                    child   = snode.d_nodes[node]
+                    while self.b_foldable(child):
+                        grandchild          = child.d_nodes.values()[0]
+                        grandchild.l_edge   = child.l_edge + \
+                                              [child.str_nodeName] + \
+                                              grandchild.l_edge
+                        grandchild.snode_parent = snode
+                        snode.d_nodes[node] = grandchild
+                        child               = grandchild
+                        folded             += 1
+                        b_changed           = True
+                    l_stack.append(child)
+                if b_changed: snode.version_bump()
+            return folded
+
+        def snode_split(self, asnode_parent, astr_key, a_edge):
+            '''
+            Unfold the node at position <a_edge> of the compressed edge
+            <astr_key> of <asnode_parent>. Returns the new node.
+            '''
+            snode       = asnode_parent.d_nodes[astr_key]
+            l_edge      = snode.l_edge
+            snode_new   = C_snode(l_edge[a_edge])
+            snode_new.depth(snode.depth() - len(l_edge) + a_edge)
+            snode_new.snode_parent      = asnode_parent
+            snode_new.d_nodes           = self.d_nodesNew()
+            snode_new.l_edge            = l_edge[:a_edge]
+            if a_edge + 1 < len(l_edge):    node    = l_edge[a_edge + 1]
+            else:                           node    = snode.str_nodeName
+            snode.l_edge                = l_edge[a_edge + 1:]
+            snode.snode_parent          = snode_new
+            snode_new.d_nodes[node]     = snode
+            asnode_parent.d_nodes[astr_key] = snode_new
+            snode_new.version_bump()
+            return snode_new
+
+        def nodes_expand(self):
+            '''
+            Unfold every compressed edge of the tree.
+            '''
+            l_stack     = [self.snode_root]
+            while len(l_stack):
+                snode   = l_stack.pop()
+                for node in snode.d_nodes.keys():
+                    if len(snode.d_nodes[node].l_edge):
+                        self.snode_split(snode, node, 0)
+                    l_stack.append(snode.d_nodes[node])
+
+        def watch(self, astr_path, afunc_callback, **kwargs):
+            '''
+            Subscribe <afunc_callback> to the mutations of the node at
+            <astr_path> (and by default of its whole subtree). Returns a
+            subscription id for unwatch().
+
+            The callback is called with a list of coalesced events
+
+                (str_path, str_verb, t_args)
+
+            (see mutationHook_add() for their meaning), batched per flush
+            interval (see watch_interval()).
+
+            Optional kwargs:
+
+                subtree = True | False      also watch the subtree
+                verbs   = [<verb>, ...]     only these mutations
+            '''
+            b_subtree   = True
+            l_verbs     = None
+            for key, val in kwargs.iteritems():
+                if key == 'subtree':    b_subtree   = val
+                if key == 'verbs':      l_verbs     = val
+            if self.watch_registry is None:
+                self.watch_registry     = C_streeWatch()
+                self.mutationHook_add(self.watch_registry.mutation)
+            l_path      = self.l_pathAbs(astr_path)
+            return self.watch_registry.subscribe('/' + '/'.join(l_path[1:]),
+                                                 afunc_callback,
+                                                 b_subtree, l_verbs)
+
+        def unwatch(self, a_id):
+            '''
+            Cancel the watch subscription <a_id>.
+            '''
+            if self.watch_registry is None: return False
+            return self.watch_registry.unsubscribe(a_id)
+
+        def watch_flush(self):
+            '''
+            Deliver all pending watch events now. Raises the first error
+            of a watch callback since the last watch_flush(), once all
+            events are delivered.
+            '''
+            if self.watch_registry is not None: self.watch_registry.flush()
+
+        def watch_interval(self, *args):
+            '''
+            Get / set the watch flush interval, in seconds. Events are
+            delivered at most once per interval: by the first mutation
+            after it has elapsed since the last delivery, or else by a
+            timer thread at its end, or on watch_flush(). With an
+            interval of 0 (the default) each event is delivered at once.
+            '''
+            if self.watch_registry is None:
+                self.watch_registry     = C_streeWatch()
+                self.mutationHook_add(self.watch_registry.mutation)
+            if len(args):
+                self.watch_registry.f_interval  = args[0]
+                return True
+            else:
+                return self.watch_registry.f_interval
+
+        def batch(self):
+            '''
+            Return a transaction for use in a 'with' statement:
+
+                with tree.batch():
+                    tree.mknode(...)
+                    ...
+
+            The mutations inside the block are applied to the nodes at
+            once (so they can be read back), but the path index and the
+            mutation hooks (journal, watches, pager, ...) are only updated
+            when the block completes, in one pass. If the block raises,
+            the mutations are undone and the cwd restored. The tree lock
+            is held throughout, so other threads that hold the lock while
+            they read (as the server and C_streeAsync do) never see a
+            partially applied batch; the plain C_stree verbs do not take
+            the lock, and readers using them can. Batches nest; only the
+            outermost commits.
+            '''
+            return C_streeBatch(self)
+
+        def undo_log(self, *args):
+            '''
+            Record how to undo a mutation, if a batch is open.
+            '''
+            if self.batch_current is not None:
+                self.batch_current.l_undo.append(args)
+
+        #
+        # Inheritable properties
+        #
+        # A property set on a node with prop_set() applies to the whole
+        # subtree below it, unless a node further down sets its own
+        # value, so a tree-wide setting is a single write at the root.
+        # Lookups walk up from the node to the nearest node that sets the
+        # property, and remember the answer on the nodes they passed. The
+        # remembered values carry a per-property stamp that every change
+        # to the property bumps, so a stale value is never served. Only
+        # nodes held in one place remember anything: a shared node (see
+        # subtrees_intern()) has more than one set of ancestors.
+
+        def prop_set(self, astr_key, avalue):
+            '''
+            Set the property <astr_key> of the current node (and of the
+            nodes below it that do not set their own) to <avalue>.
+            '''
+            snode       = self.cow_path()
+            self.undo_log('prop', snode, astr_key, astr_key in snode.d_props,
+                          snode.d_props.get(astr_key))
+            snode.d_props[astr_key]     = avalue
+            self.prop_bump(astr_key)
+            snode.version_bump()
+            self.mutation_notify('prop_set', self.l_cwd[:], astr_key, avalue)
+            return True
+
+        def prop_unset(self, astr_key):
+            '''
+            Remove the property <astr_key> from the current node, which
+            then inherits it again.
+            '''
+            snode       = self.cow_path()
+            if astr_key not in snode.d_props: return False
+            self.undo_log('prop', snode, astr_key, True, snode.d_props[astr_key])
+            del snode.d_props[astr_key]
+            self.prop_bump(astr_key)
+            snode.version_bump()
+            self.mutation_notify('prop_unset', self.l_cwd[:], astr_key)
+            return True
+
+        def prop_bump(self, astr_key):
+            '''
+            Invalidate the remembered values of the property <astr_key>.
+            '''
+            self.d_propStamp[astr_key]  = self.d_propStamp.get(astr_key, 0) + 1
+
+        def props_invalidate(self):
+            '''
+            Invalidate all remembered property values and constraints.
+            '''
+            for key in self.d_propStamp.keys(): self.prop_bump(key)
+            self.constraint_bump()
+
+        def constraint_bump(self):
+            '''
+            Invalidate the remembered constraints, after a change to the
+            mustInclude / mustNotInclude of any node of the tree.
+            '''
+            self._constraintStamp      += 1
+
+        def l_chainCurrent(self, astr_path):
+            '''
+            Return the node chain to <astr_path>, or to the cwd if the path
+            is empty.
+            '''
+            if len(astr_path):
+                return self.l_snodeChain(self.l_pathAbs(astr_path),
+                                         ab_split = False)
+            return self.l_snodeChain(self.l_cwd, ab_split = False)
+
+        @staticmethod
+        def chainUnique(al_chain):
+            '''
+            Return the number of leading nodes of <al_chain> that are held
+            in one place only.
+            '''
+            for depth in range(1, len(al_chain)):
+                if al_chain[depth]._refs > 1: return depth
+            return len(al_chain)
+
+        def prop_get(self, astr_key, astr_path = "", adefault = None):
+            '''
+            Return the value of the property <astr_key> at the node
+            <astr_path> (default: the cwd): its own value, or else the
+            value set by its nearest ancestor, or else <adefault>.
+            '''
+            l_chain     = self.l_chainCurrent(astr_path)
+            if l_chain is None: return adefault
+            stamp       = self.d_propStamp.get(astr_key, 0)
+            t_value     = (False, None)             # (b_set, value)
+            depth       = len(l_chain) - 1
+            while depth >= 0:
+                snode   = l_chain[depth]
+                if astr_key in snode.d_props:
+                    t_value = (True, snode.d_props[astr_key])
+                    break
+                t_cached = snode.d_propCache.get(astr_key)
+                if t_cached is not None and t_cached[0] == stamp:
+                    t_value = t_cached[1]
+                    break
+                depth  -= 1
+            for snode in l_chain[depth + 1:C_stree.chainUnique(l_chain)]:
+                snode.d_propCache[astr_key] = (stamp, t_value)
+            if t_value[0]: return t_value[1]
+            return adefault
+
+        def t_constraints(self, astr_path = ""):
+            '''
+            Return the combined (mustInclude, mustNotInclude) lists of the
+            node <astr_path> (default: the cwd) and all its ancestors,
+            root first. The combined lists are remembered on the nodes,
+            stamped with the constraint stamp of the tree, so changes must
+            go through node_mustInclude() / node_mustNotInclude().
+            '''
+            l_chain     = self.l_chainCurrent(astr_path)
+            if l_chain is None: return None
+            stamp       = self._constraintStamp
+            depth       = len(l_chain) - 1
+            t_combined  = ([], [])
+            while depth >= 0:
+                t_cached = l_chain[depth].t_constraintCache
+                if t_cached is not None and t_cached[0] == stamp:
+                    t_combined  = t_cached[1]
+                    break
+                depth  -= 1
+            unique      = C_stree.chainUnique(l_chain)
+            for depth in range(depth + 1, len(l_chain)):
+                meta        = l_chain[depth].meta
+                t_combined  = (t_combined[0] + meta.l_mustInclude,
+                               t_combined[1] + meta.l_mustNotInclude)
+                if depth < unique:
+                    l_chain[depth].t_constraintCache = (stamp, t_combined)
+            return t_combined[0][:], t_combined[1][:]
+
+        def d_dump(self):
+            '''
+            Return a plain (picklable) dictionary describing the whole
+            tree, suitable for tree_load().
+            '''
+            return {'childOrder':       self.str_childOrder,
+                    'printMetaData':    self.b_printMetaData,
+                    'root':             self.snode_root.d_dump()}
+
+        def tree_load(self, ad_dump):
+            '''
+            Replace the contents of this tree with the tree described by
+            <ad_dump>, a dictionary as returned by d_dump().
+            '''
+            self.str_childOrder         = ad_dump['childOrder']
+            self.b_printMetaData        = ad_dump['printMetaData']
+            self.snode_root.d_nodes     = self.d_nodesNew()
+            self.snode_root.version_bump()
+            self.root()
+            self.l_allPaths             = self.l_cwd[:]
+            self.s_allPaths             = set()
+            self.snode_load(ad_dump['root'], self.snode_root)
+            self.props_invalidate()
+
+        def snode_load(self, ad_snode, asnode, al_path = ['/'], ab_paths = True):
+            '''
+            Populate <asnode> (already placed in the tree at path list
+            <al_path>) from the node dictionary <ad_snode> as returned by
+            C_snode.d_dump(), creating its subtree. Unless <ab_paths> is
+            False, the paths of the new nodes are added to l_allPaths.
+            '''
+            asnode.d_data               = ad_snode['data']
+            asnode.b_printMetaData      = ad_snode['printMetaData']
+            asnode.d_props              = dict(ad_snode.get('props', {}))
+            asnode.d_propCache          = {}
+            asnode.t_constraintCache    = None
+            d_meta                      = ad_snode['meta']
+            asnode.meta._hitCount       = d_meta['hitCount']
+            asnode.meta.l_canInclude    = d_meta['canInclude']
+            asnode.meta.l_mustInclude   = d_meta['mustInclude']
+            asnode.meta.l_mustNotInclude = d_meta['mustNotInclude']
+            self.nodes_load(ad_snode['nodes'], asnode, al_path, ab_paths)
+
+        def nodes_load(self, al_snode, asnode, al_path = ['/'], ab_paths = True):
+            '''
+            Create the children of <asnode> (at path list <al_path>) from
+            the list <al_snode> of node dictionaries, see snode_load().
+            '''
+            for d_child in al_snode:
+                snode                   = C_snode(d_child['name'])
+                snode.depth(asnode.depth() + 1)
+                snode.snode_parent      = asnode
+                snode.d_nodes           = self.d_nodesNew()
+                asnode.d_nodes[d_child['name']] = snode
+                l_path                  = al_path + [d_child['name']]
+                if ab_paths:
+                    self.l_allPaths.append(l_path)
+                    self.s_allPaths.add(tuple(l_path))
+                self.snode_load(d_child, snode, l_path, ab_paths)
+            asnode.version_bump()
+
+        def d_nodesNew(self):
+            '''
+            Return an empty child container for a new node.
+            '''
+            if self.str_childOrder:
+                return C_orderedNodes(self.str_childOrder)
+            return {}
+
         def root(self):
             """
             Reset all nodes and branches to 'root'.
@@ -470,24 +2000,48 @@ class C_stree:
             Either appends or resets the <mustNotInclude> list of snode_current
             depending on <ab_reset>.
             """
+            meta            = self.cow_path().meta
+            self.undo_log('attr', meta, 'l_mustNotInclude', meta.l_mustNotInclude)
             if ab_reset:
-                self.snode_current.l_mustNotInclude = al_mustNotInclude[:]
+                meta.mustNotInclude(al_mustNotInclude[:])
             else:
-                l_current   = self.snode_current.l_mustNotInclude[:]
+                l_current   = meta.mustNotInclude()[:]
                 l_total     = l_current + al_mustNotInclude
-                self.snode_current.l_mustNotInclude = l_total[:]
+                meta.mustNotInclude(l_total[:])
+            self.constraint_bump()
+            self.mutation_notify('node_mustNotInclude', self.l_cwd[:],
+                                 al_mustNotInclude[:], ab_reset)
 
         def node_mustInclude(self, al_mustInclude, ab_reset=False):
             """
             Either appends or resets the <mustInclude> list of snode_current
             depending on <ab_reset>.
             """
+            meta            = self.cow_path().meta
+            self.undo_log('attr', meta, 'l_mustInclude', meta.l_mustInclude)
             if ab_reset:
-                self.snode_current.l_mustInclude = al_mustInclude[:]
+                meta.mustInclude(al_mustInclude[:])
             else:
-                l_current   = self.snode_current.l_mustInclude[:]
+                l_current   = meta.mustInclude()[:]
                 l_total     = l_current + al_mustInclude
-                self.snode_current.l_mustInclude = l_total[:]
+                meta.mustInclude(l_total[:])
+            self.constraint_bump()
+            self.mutation_notify('node_mustInclude', self.l_cwd[:],
+                                 al_mustInclude[:], ab_reset)
+
+        def node_hitCount(self, a_count, ab_reset=False):
+            """
+            Either adds <a_count> to, or resets to <a_count>, the hitCount
+            of snode_current depending on <ab_reset>.
+            """
+            meta            = self.cow_path().meta
+            self.undo_log('attr', meta, '_hitCount', meta._hitCount)
+            if ab_reset:
+                meta.hitCount(a_count)
+            else:
+                meta.hitCount(meta.hitCount() + a_count)
+            self.mutation_notify('node_hitCount', self.l_cwd[:],
+                                 a_count, ab_reset)
 
         def paths_update(self, al_branchNodes):
             """
@@ -496,13 +2050,20 @@ class C_stree:
             typically not called by a user, but by other methods in
             this module.
             """
+            l_paths         = self.l_allPaths
+            s_paths         = self.s_allPaths
+            if self.batch_current is not None:
+                # Merged into l_allPaths when the batch commits
+                l_paths     = self.batch_current.l_paths
+                s_paths     = self.batch_current.s_paths
             for node in al_branchNodes:
                 #print "appending %s" % node
                 l_pwd       = self.l_cwd[:]
                 l_pwd.append(node)
                 #print "l_pwd: %s" % l_pwd
                 #print "ml_cwd: %s" % self.ml_cwd
-                self.l_allPaths.append(l_pwd)
+                l_paths.append(l_pwd)
+                s_paths.add(tuple(l_pwd))
 
         def mknode(self, al_branchNodes):
             """
@@ -511,6 +2072,7 @@ class C_stree:
             just "directories" but also "files")
             """
             b_ret = True
+            self.cow_path()
             # First check that none of these nodes already exist in the tree
             l_branchNodes = []
             for node in al_branchNodes:
@@ -522,16 +2084,51 @@ class C_stree:
                 if not self.b_pathOK(l_path):
                     l_branchNodes.append(node)
             snodeBranch   = C_snodeBranch(l_branchNodes)
+            d_branch      = collections.OrderedDict()
             for node in l_branchNodes:
                 depth = self.snode_current.depth()
                 # if (self.msnode_current != self.msnode_root):
                 snodeBranch.dict_branch[node].depth(depth+1)
                 snodeBranch.dict_branch[node].snode_parent = self.snode_current
-            self.snode_current.node_dictBranch(snodeBranch.dict_branch)
+                snodeBranch.dict_branch[node].d_nodes = self.d_nodesNew()
+                d_branch[node]  = snodeBranch.dict_branch[node]
+            self.snode_current.node_dictBranch(d_branch)
+            self.undo_log('mknode', self.snode_current, l_branchNodes)
             # Update the ml_allPaths
             self.paths_update(al_branchNodes)
+            self.mutation_notify('mknode', self.l_cwd[:], al_branchNodes[:])
             return b_ret
 
+        def rmnode(self, astr_name):
+            """
+            Remove the node <astr_name>, and its subtree, from the current
+            node. Analogous to a UNIX 'rm -r'. The path index is filtered,
+            which takes time in the size of the tree.
+            """
+            snode       = self.cow_path()
+            if astr_name not in snode.d_nodes: return False
+            t_path      = tuple(self.l_cwd + [astr_name])
+            depth       = len(t_path)
+            l_removed   = [l_path for l_path in self.l_allPaths
+                                if tuple(l_path[:depth]) == t_path]
+            self.undo_log('rmnode', snode, astr_name, snode.d_nodes[astr_name],
+                          l_removed)
+            self.snode_unref(snode.d_nodes[astr_name])
+            del snode.d_nodes[astr_name]
+            snode.version_bump()
+            self.l_allPaths     = [l_path for l_path in self.l_allPaths
+                                    if tuple(l_path[:depth]) != t_path]
+            self.s_allPaths.difference_update([tuple(l_path)
+                                               for l_path in l_removed])
+            batch       = self.batch_current
+            if batch is not None:
+                batch.l_paths   = [l_path for l_path in batch.l_paths
+                                    if tuple(l_path[:depth]) != t_path]
+                batch.s_paths   = set([t for t in batch.s_paths
+                                        if t[:depth] != t_path])
+            self.mutation_notify('rmnode', self.l_cwd[:], astr_name)
+            return True
+
         def cat(self, name):
             '''
             Returns the contents of the 'name'd element at this level.
@@ -546,7 +2143,18 @@ class C_stree:
             # print("here!")
             # print(self.snode_current)
             # print(self.snode_current.d_nodes)
+            self.cow_path()
+            if self.pool_intern is not None:
+                data    = self.pool_intern.value_intern(data)
+                if name in self.snode_current.d_data:
+                    self.pool_intern.value_release(
+                                        self.snode_current.d_data[name])
+            self.undo_log('touch', self.snode_current, name,
+                          name in self.snode_current.d_data,
+                          self.snode_current.d_data.get(name))
             self.snode_current.d_data[name] = data
+            self.snode_current.version_bump()
+            self.mutation_notify('touch', self.l_cwd[:], name, data)
             # print(self.snode_current)
             return b_OK
 
@@ -555,9 +2163,12 @@ class C_stree:
             Checks if the absolute path specified in the al_path
             is valid for current tree
             """
-            b_OK  = True
-            try:          self.l_allPaths.index(al_path)
-            except:       b_OK    = False
+            t_path  = tuple(al_path)
+            b_OK    = t_path in self.s_allPaths
+            if not b_OK and self.batch_current is not None:
+                b_OK    = t_path in self.batch_current.s_paths
+            if not b_OK and self.pager is not None:
+                b_OK    = self.pager.b_pathSpilled(al_path)
             return b_OK
 
         def b_pathInTree(self, astr_path):
@@ -624,23 +2235,464 @@ class C_stree:
             if b_valid:
                 #print "got cdpath = %s" % l_absPath
                 self.l_cwd              = l_absPath[:]
-                self.snode_current      = self.snode_root
                 self.sbranch_current    = self.sbranch_root
                 #print l_absPath
-                for node in l_absPath[1:]:
-                    self.snode_current = self.snode_current.d_nodes[node]
-                self.sbranch_current.dict_branch = self.snode_current.snode_parent.d_nodes
+                # A shared node has several parents, so the branch is
+                #+ that of the parent on the path walked, not snode_parent.
+                l_chain                 = self.l_snodeChain(l_absPath,
+                                                            ab_split = False)
+                self.snode_current      = l_chain[-1]
+                self.sbranch_current.dict_branch = l_chain[max(len(l_chain) - 2, 0)].d_nodes
             return self.l_cwd
 
+        def l_pathAbs(self, astr_path):
+            '''
+            Convert the string <astr_path>, absolute or relative to the
+            cwd, to an absolute path list, resolving '.' and '..' (the
+            root node is its own parent). Unlike b_pathInTree(), the
+            path is not checked against the tree and the cwd is not
+            touched.
+            '''
+            if astr_path[:1] == '/':    l_path  = ['/']
+            else:                       l_path  = self.l_cwd[:]
+            l_node      = [node for node in astr_path.split('/')
+                                if len(node) and node != '.']
+            if '..' not in l_node: return l_path + l_node
+            for node in l_node:
+                if node == '..':
+                    if len(l_path) > 1: l_path.pop()
+                    continue
+                l_path.append(node)
+            return l_path
+
+        def l_snodeChain(self, al_path, ab_split = True):
+            '''
+            Return the list of C_snodes from the root down to the node at
+            the absolute path list <al_path>, or None if there is no such
+            node.
+
+            In a compressed tree, the compressed edges on the path are
+            unfolded so that there is one node per name on the path.
+            With <ab_split> False, only a folded node that the path ends
+            on is unfolded, and the chain holds just the nodes on the
+            path that exist, each compressed edge being one hop.
+            '''
+            snode       = self.snode_root
+            l_chain     = [snode]
+            depth       = 1
+            while depth < len(al_path):
+                t_step  = self.t_chainStep(snode, al_path, depth, ab_split)
+                if t_step is None: return None
+                snode, depth    = t_step
+                l_chain.append(snode)
+            if self.pager is not None: self.pager.snode_access(l_chain)
+            return l_chain
+
+        def t_chainStep(self, asnode, al_path, a_depth, ab_split = True):
+            '''
+            One step down the path list <al_path> from <asnode>, the node
+            at <al_path>[:<a_depth>]: return the next node, and the depth
+            on the path just past it, or None if there is no such node.
+            See l_snodeChain() for <ab_split>.
+            '''
+            node        = al_path[a_depth]
+            while True:
+                if node not in asnode.d_nodes: return None
+                child   = asnode.d_nodes[node]
+                if not len(child.l_edge): return child, a_depth + 1
+                l_along = child.l_edge + [child.str_nodeName]
+                l_rest  = al_path[a_depth:a_depth + len(l_along)]
+                if l_rest != l_along[:len(l_rest)]: return None
+                if ab_split:
+                    self.snode_split(asnode, node, 0)
+                elif len(l_rest) < len(l_along):
+                    self.snode_split(asnode, node, len(l_rest) - 1)
+                else:
+                    return child, a_depth + len(l_along)
+
+        def l_snodeMany(self, al_paths):
+            '''
+            Return the C_snodes (or None) at each of the absolute path
+            lists <al_paths>. The paths are resolved in sorted order, each
+            starting from the deepest node it shares with the one before,
+            so a common prefix is walked once rather than once per path.
+            '''
+            l_snode     = [None] * len(al_paths)
+            l_prev      = ['/']
+            l_chain     = [self.snode_root]     # nodes down l_prev, and
+            l_depth     = [1]                   #+ the depth past each
+            for i in sorted(range(len(al_paths)), key = al_paths.__getitem__):
+                l_path  = al_paths[i]
+                length  = min(len(l_prev), len(l_path))
+                if l_prev[:length - 1] == l_path[:length - 1]:
+                    common  = length - 1    # siblings, mostly
+                else:
+                    common  = 1
+                while common < length and l_prev[common] == l_path[common]:
+                    common += 1
+                while l_depth[-1] > common:
+                    l_chain.pop()
+                    l_depth.pop()
+                l_prev  = l_path
+                snode   = l_chain[-1]
+                depth   = l_depth[-1]
+                while depth < len(l_path):
+                    child   = snode.d_nodes.get(l_path[depth])
+                    if child is not None and not len(child.l_edge):
+                        snode   = child
+                        depth  += 1
+                    else:
+                        t_step  = self.t_chainStep(snode, l_path, depth, False)
+                        if t_step is None: break
+                        snode, depth    = t_step
+                    l_chain.append(snode)
+                    l_depth.append(depth)
+                if depth < len(l_path): continue
+                if self.pager is not None: self.pager.snode_access(l_chain)
+                l_snode[i]  = snode
+            return l_snode
+
+        def l_snodeFind(self, al_paths):
+            '''
+            Return the C_snodes (or None) at each of the path strings
+            <al_paths>, in order, without changing the cwd. The paths are
+            grouped by parent, so that each parent is resolved only once
+            (with l_snodeMany()) and its children are then simple lookups.
+            '''
+            if self.pager is not None:
+                return self.l_snodeMany([self.l_pathAbs(str_path)
+                                         for str_path in al_paths])
+            d_group     = {}    # parent path -> [(index, node name)]
+            for i in range(len(al_paths)):
+                str_parent, str_sep, node = al_paths[i].rpartition('/')
+                d_group.setdefault(str_parent or str_sep, []).append((i, node))
+            l_parent    = d_group.keys()
+            l_snode     = [None] * len(al_paths)
+            for str_parent, snode in zip(l_parent, self.l_snodeMany(
+                            [self.l_pathAbs(str_path) for str_path in l_parent])):
+                for i, node in d_group[str_parent]:
+                    if node in ['', '.', '..']:
+                        l_snode[i]  = self.snode_find(al_paths[i])
+                        continue
+                    if snode is None: continue
+                    child   = snode.d_nodes.get(node)
+                    if child is not None and len(child.l_edge):
+                        child   = self.snode_find(al_paths[i])
+                    l_snode[i]  = child
+            return l_snode
+
+        #
+        # Path addressed batch operations
+        #
+        # cat_many(), touch_many() and mknode_many() work on lists of
+        # paths, share the walks down common prefixes (see l_snodeFind())
+        # and leave the cwd where it was. The mutating ones run as one
+        # batch, so they are atomic and update the path index and the
+        # mutation hooks once.
+
+        def cat_many(self, al_paths, astr_name, **kwargs):
+            '''
+            Return the <astr_name> data of the nodes at each of the paths
+            <al_paths>, in order.
+
+            Optional kwargs:
+
+                default = <value>   returned for a missing node or item;
+                                    without it, these raise KeyError
+            '''
+            b_default   = 'default' in kwargs
+            default     = kwargs.get('default')
+            self.lock.acquire()
+            try:
+                l_snode = self.l_snodeFind(al_paths)
+            finally:
+                self.lock.release()
+            l_data      = []
+            for i in range(len(l_snode)):
+                d_data  = l_snode[i] is not None and l_snode[i].d_data or {}
+                if astr_name in d_data:
+                    l_data.append(d_data[astr_name])
+                elif b_default:
+                    l_data.append(default)
+                else:
+                    raise KeyError('%s: %s' % (al_paths[i], astr_name))
+            return l_data
+
+        def node_at(self, al_path, asnode):
+            '''
+            Make <asnode>, at the path list <al_path>, the current node,
+            without resolving the path.
+            '''
+            self.l_cwd              = al_path[:]
+            self.snode_current      = asnode
+
+        def touch_many(self, al_pairs):
+            '''
+            For each (<path>, <d_data>) of <al_pairs>, touch the items of
+            the dictionary <d_data> into the node at <path>. Raises
+            KeyError, and changes nothing, if a node does not exist.
+            Returns the list of results of touch(), in order.
+            '''
+            str_cwd     = self.cwd()
+            l_path      = [self.l_pathAbs(t_pair[0]) for t_pair in al_pairs]
+            l_ret       = []
+            with self.batch():
+                l_snode = self.l_snodeFind([t_pair[0] for t_pair in al_pairs])
+                for i in range(len(al_pairs)):
+                    if l_snode[i] is None: raise KeyError(al_pairs[i][0])
+                    self.node_at(l_path[i], l_snode[i])
+                    b_ret   = True
+                    for name, data in al_pairs[i][1].iteritems():
+                        b_ret   = self.touch(name, data) and b_ret
+                    l_ret.append(b_ret)
+                self.cdnode(str_cwd)
+            return l_ret
+
+        def mknode_many(self, al_paths):
+            '''
+            Create the nodes at each of the paths <al_paths>, along with
+            any missing ancestors. Returns, in order, whether each node
+            was created (False if it existed already).
+            '''
+            str_cwd     = self.cwd()
+            l_path      = [self.l_pathAbs(str_path) for str_path in al_paths]
+            l_ret       = []
+            s_new       = set()
+            for l in l_path:
+                b_new   = len(l) > 1 and not self.b_pathOK(l) and \
+                          tuple(l) not in s_new
+                s_new.add(tuple(l))
+                l_ret.append(b_new)
+            # The names to create under each parent, by depth
+            d_level     = {}
+            for l in l_path:
+                for depth in range(2, len(l) + 1):
+                    d_children  = d_level.setdefault(depth, {})
+                    l_names     = d_children.setdefault(tuple(l[:depth - 1]), [])
+                    if l[depth - 1] not in l_names: l_names.append(l[depth - 1])
+            with self.batch():
+                for depth in sorted(d_level.keys()):
+                    l_parent    = d_level[depth].keys()
+                    l_snode     = self.l_snodeMany([list(t) for t in l_parent])
+                    for t_parent, snode in zip(l_parent, l_snode):
+                        l_new   = [node for node in d_level[depth][t_parent]
+                                    if not self.b_pathOK(list(t_parent) + [node])]
+                        if not len(l_new): continue
+                        self.node_at(list(t_parent), snode)
+                        self.mknode(l_new)
+                self.cdnode(str_cwd)
+            return l_ret
+
+        def snode_find(self, astr_path):
+            '''
+            Return the C_snode at <astr_path> (or None), without changing
+            the cwd.
+            '''
+            l_chain     = self.l_snodeChain(self.l_pathAbs(astr_path),
+                                            ab_split = False)
+            if l_chain is None: return None
+            return l_chain[-1]
+
+        def snode_peek(self, al_path):
+            '''
+            Return the C_snode at the absolute path list <al_path> (or
+            None) without changing the tree, for readers that share it
+            (e.g. the lower layers of a C_streeOverlay). Unlike
+            snode_find(), a compressed edge is never unfolded: a path
+            that ends inside one gives a stand-alone copy of the folded
+            node, whose only child is the rest of the edge.
+            '''
+            snode       = self.snode_root
+            depth       = 1
+            while depth < len(al_path):
+                node    = al_path[depth]
+                if node not in snode.d_nodes: return None
+                child   = snode.d_nodes[node]
+                l_along = child.l_edge + [child.str_nodeName]
+                l_rest  = al_path[depth:depth + len(l_along)]
+                if l_rest != l_along[:len(l_rest)]: return None
+                if len(l_rest) < len(l_along):
+                    snode_folded    = child.snode_edge(len(l_rest) - 1)
+                    snode_folded.d_nodes[l_along[len(l_rest)]] = child
+                    return snode_folded
+                snode   = child
+                depth  += len(l_along)
+            return snode
+
+        #
+        # Preorder interval labels
+        #
+        # Each node has an entry number, its position in a preorder walk
+        # of the tree, and an exit number, the largest entry number in its
+        # subtree. A node X is then an ancestor of Y iff
+        #
+        #       entry(X) <= entry(Y) <= exit(Y) <= exit(X)
+        #
+        # and the subtree of X is the contiguous preorder range
+        # [entry(X), exit(X)]. The labels are kept as subtree sizes and
+        # child offsets on the nodes themselves and recomputed lazily,
+        # only for the nodes whose version changed since they were last
+        # labelled -- after a mutation that is just the path from the
+        # root to the changed node.
+
+        def label_update(self, asnode = None):
+            '''
+            Bring the labels of the subtree at <asnode> (default: the
+            root) up to date.
+            '''
+            if asnode is None: asnode = self.snode_root
+            l_stack     = [(asnode, False)]
+            while len(l_stack):
+                snode, b_childrenDone = l_stack.pop()
+                if snode._labelVersion == snode._version: continue
+                if not b_childrenDone:
+                    l_stack.append((snode, True))
+                    for node in snode.d_nodes.keys():
+                        l_stack.append((snode.d_nodes[node], False))
+                    continue
+                size                = 1
+                if len(snode.d_nodes):
+                    snode.d_offset  = {}
+                    for node in snode.d_nodes.keys():
+                        snode.d_offset[node]    = size
+                        size                   += snode.d_nodes[node]._size + \
+                                                  len(snode.d_nodes[node].l_edge)
+                else:
+                    snode.d_offset  = None
+                snode._size         = size
+                snode._labelVersion = snode._version
+
+        def l_labelChain(self, al_path):
+            '''
+            Return the (entry, exit) preorder labels of the nodes from the
+            root down to the node at the absolute path list <al_path>, or
+            None if there is no such node. Compressed edges are read, not
+            unfolded: the names along an edge are numbered one after the
+            other, and all end where the folded node does.
+            '''
+            self.label_update()
+            snode       = self.snode_root
+            l_label     = [(0, snode._size - 1)]
+            entry       = 0
+            depth       = 1
+            while depth < len(al_path):
+                node    = al_path[depth]
+                if node not in snode.d_nodes: return None
+                child   = snode.d_nodes[node]
+                entry  += snode.d_offset[node]
+                exit    = entry + len(child.l_edge) + child._size - 1
+                for node in child.l_edge + [child.str_nodeName]:
+                    if depth == len(al_path): return l_label
+                    if al_path[depth] != node: return None
+                    l_label.append((entry, exit))
+                    entry  += 1
+                    depth  += 1
+                entry  -= 1
+                snode   = child
+            return l_label
+
+        def t_label(self, astr_path):
+            '''
+            Return the (entry, exit) preorder label of the node at
+            <astr_path>, or None if there is no such node.
+            '''
+            l_label     = self.l_labelChain(self.l_pathAbs(astr_path))
+            if l_label is None: return None
+            return l_label[-1]
+
+        @staticmethod
+        def b_labelIsAncestor(at_ancestor, at_node):
+            '''
+            O(1) check, on two labels returned by t_label(), whether the
+            first node is an ancestor of (or the same as) the second.
+            '''
+            return at_ancestor[0] <= at_node[0] and at_node[1] <= at_ancestor[1]
+
+        def b_isAncestor(self, astr_ancestor, astr_path):
+            '''
+            Check whether the node at <astr_ancestor> is an ancestor of
+            (or the same as) the node at <astr_path>.
+            '''
+            t_ancestor  = self.t_label(astr_ancestor)
+            t_node      = self.t_label(astr_path)
+            if t_ancestor is None or t_node is None: return False
+            return C_stree.b_labelIsAncestor(t_ancestor, t_node)
+
+        def lstr_preorder(self):
+            '''
+            Return the paths of all nodes in preorder, i.e. indexed by
+            their entry number. The list is cached until the tree is
+            next mutated.
+            '''
+            if self._preorderVersion == self.snode_root._version:
+                return self.lstr_preorderPaths
+            lstr_paths  = []
+            l_stack     = [('/', self.snode_root, 0)]
+            while len(l_stack):
+                # <edge> is the position along the compressed edge of
+                #+ <snode> that <str_path> names; past it, <snode> itself.
+                str_path, snode, edge = l_stack.pop()
+                lstr_paths.append(str_path)
+                if edge < len(snode.l_edge):
+                    if edge + 1 < len(snode.l_edge):
+                        node    = snode.l_edge[edge + 1]
+                    else:
+                        node    = snode.str_nodeName
+                    l_stack.append(('%s/%s' % (str_path, node), snode, edge + 1))
+                    continue
+                if str_path == '/': str_path = ''
+                for node in reversed(snode.d_nodes.keys()):
+                    l_stack.append(('%s/%s' % (str_path, node),
+                                    snode.d_nodes[node], 0))
+            self.lstr_preorderPaths     = lstr_paths
+            self._preorderVersion       = self.snode_root._version
+            return lstr_paths
+
+        def lstr_subtree(self, astr_path):
+            '''
+            Return the paths of all nodes in the subtree at <astr_path>
+            (including itself), in preorder, as a slice of the preorder
+            listing.
+            '''
+            t_label     = self.t_label(astr_path)
+            if t_label is None: return []
+            return self.lstr_preorder()[t_label[0]:t_label[1] + 1]
+
+        def str_lca(self, astr_path1, astr_path2):
+            '''
+            Return the path of the lowest common ancestor of the nodes at
+            <astr_path1> and <astr_path2>, or None if either does not
+            exist. Walks down from the root along <astr_path1> for as long
+            as the labels show that <astr_path2> is still below.
+            '''
+            l_path      = self.l_pathAbs(astr_path1)
+            l_label     = self.l_labelChain(l_path)
+            t_node      = self.t_label(astr_path2)
+            if l_label is None or t_node is None: return None
+            depth       = 0
+            for t_child in l_label[1:]:
+                if not C_stree.b_labelIsAncestor(t_child, t_node): break
+                depth  += 1
+            return '/' + '/'.join(l_path[1:depth + 1])
+
         def ls(self, astr_path="", **kwargs):
+            '''
+            List the nodes and data at <astr_path>. Besides 'data' and
+            'nodes' (booleans selecting what to return), the paging
+            kwargs of lstr_nodePage() are passed through to the node
+            listing.
+            '''
             b_lsData    = True
             b_lsNodes   = True
+            d_page      = {}
             if len(astr_path): self.cdnode(astr_path)
-            str_nodes   = self.str_lsnode(astr_path)
-            d_data      = self.snode_current.d_data
             for key, val in kwargs.iteritems():
                 if key == 'data':   b_lsData    = val
                 if key == 'nodes':  b_lsNodes   = val
+                if key in ['offset', 'limit', 'prefix', 'cursor']:
+                    d_page[key] = val
+            str_nodes   = self.str_lsnode(astr_path, **d_page)
+            d_data      = self.snode_current.d_data
             if b_lsData and b_lsNodes:
                 return str_nodes, d_data
             if b_lsData:
@@ -650,29 +2702,69 @@ class C_stree:
             return str_nodes, d_data
 
 
-        def str_lsnode(self, astr_path=""):
+        def lstr_nodePage(self, asnode, **kwargs):
+            '''
+            Return (a page of) the names of the children of <asnode>.
+
+            Optional kwargs:
+
+                offset  = <n>       skip the first <n> names
+                limit   = <n>       return at most <n> names
+                prefix  = <str>     only names starting with <str>
+                cursor  = <name>    start after <name>, typically the
+                                    last name of the previous page;
+                                    KeyError if there is no such child
+
+            Nodes held in a C_orderedNodes container are paged in
+            O(log n + page); plain dictionaries are filtered in O(n).
+            '''
+            offset      = 0
+            limit       = None
+            prefix      = ''
+            cursor      = None
+            for key, val in kwargs.iteritems():
+                if key == 'offset': offset  = val
+                if key == 'limit':  limit   = val
+                if key == 'prefix': prefix  = val
+                if key == 'cursor': cursor  = val
+            d_nodes     = asnode.d_nodes
+            if isinstance(d_nodes, C_orderedNodes):
+                return d_nodes.l_page(offset, limit, prefix, cursor)
+            l_keys      = d_nodes.keys()
+            if cursor is not None:
+                if cursor not in d_nodes: raise KeyError(cursor)
+                l_keys  = l_keys[l_keys.index(cursor)+1:]
+            if len(prefix):
+                l_keys  = [key for key in l_keys if key.startswith(prefix)]
+            if limit is None:
+                return l_keys[offset:]
+            return l_keys[offset:offset+limit]
+
+        def str_lsnode(self, astr_path="", **kwargs):
             """
-            Print/return the set of nodes branching from current node as string
+            Print/return the set of nodes branching from current node as string.
+            The paging kwargs of lstr_nodePage() are understood.
             """
             self.sCore.reset()
             str_cwd       = self.cwd()
             if len(astr_path): self.cdnode(astr_path)
-            for node in self.snode_current.d_nodes.keys():
+            for node in self.lstr_nodePage(self.snode_current, **kwargs):
                 self.sCore.write('%s\n' % node)
             str_ls = self.sCore.strget()
             print(str_ls)
             if len(astr_path): self.cdnode(str_cwd)
             return str_ls
 
-        def lstr_lsnode(self, astr_path=""):
+        def lstr_lsnode(self, astr_path="", **kwargs):
             """
             Return the string names of the set of nodes branching from
-            current node as list of strings
+            current node as list of strings. The paging kwargs of
+            lstr_nodePage() are understood.
             """
             self.sCore.reset()
             str_cwd       = self.cwd()
             if len(astr_path): self.cdnode(astr_path)
-            lst = self.snode_current.d_nodes.keys()
+            lst = self.lstr_nodePage(self.snode_current, **kwargs)
             if len(astr_path): self.cdnode(str_cwd)
             return lst
 
@@ -696,7 +2788,8 @@ class C_stree:
             self.sCore.reset()
             str_cwd       = self.cwd()
             if len(astr_path): self.cdnode(astr_path)
-            str_ls        = '%s' % self.snode_current
+            str_ls        = self.snode_current.str_render(self.cache_render,
+                                            self.b_metaDataPrint(self.l_cwd))
             print(str_ls)
             if len(astr_path): self.cdnode(str_cwd)
             return str_ls
@@ -711,24 +2804,56 @@ class C_stree:
             self.sCore.reset()
             str_cwd       = self.cwd()
             if len(astr_path): self.cdnode(astr_path)
-            b_contentsFlag        = self.snode_current.b_printContents
-            self.snode_current.b_printContents = False
-            str_ls        = '%s' % self.snode_current
+            snode         = self.snode_current
+            b_contentsFlag        = snode.b_printContents
+            snode.b_printContents = False
+            str_ls        = snode.str_render(self.cache_render,
+                                             self.b_metaDataPrint(self.l_cwd))
             print(str_ls)
+            snode.b_printContents = b_contentsFlag
             if len(astr_path): self.cdnode(str_cwd)
-            self.snode_current.b_printContents  = b_contentsFlag
             return str_ls
 
         def tree_metaData_print(self, aval):
+            '''
+            Set the meta data print flag of the whole tree. The flag is
+            set on the root node only and inherited by the nodes below
+            it, except those that set their own (see treeNode_metaSet()).
+            '''
+            self.undo_log('attr', self, 'b_printMetaData', self.b_printMetaData)
             self.metaData_print(aval)
-            self.treeRecurse(self.treeNode_metaSet)
+            snode_root  = self.snode_root
+            self.undo_log('attr', snode_root, 'b_printMetaData',
+                          snode_root.b_printMetaData)
+            snode_root.metaData_print(aval)
+            self.mutation_notify('tree_metaData_print', ['/'], aval)
+
+        def b_metaDataPrint(self, al_path):
+            '''
+            Return whether the node at the absolute path list <al_path>
+            prints its meta data: its own flag, or else the flag of its
+            nearest ancestor that sets one.
+            '''
+            l_chain     = self.l_snodeChain(al_path, ab_split = False)
+            if l_chain is None: return True
+            for snode in reversed(l_chain):
+                if snode.b_printMetaData is not None:
+                    return snode.b_printMetaData
+            return True
 
         def treeNode_metaSet(self, astr_path, **kwargs):
             '''
             Sets the metaData_print bit on node at <astr_path>.
             '''
             self.cdnode(astr_path)
-            self.snode_current.metaData_print(self.b_printMetaData)
+            snode       = self.cow_path()
+            self.undo_log('attr', snode, 'b_printMetaData',
+                          snode.b_printMetaData)
+            snode.metaData_print(self.b_printMetaData)
+            # The path is the cwd, so the record holds the flag that was
+            #+ set rather than the arguments, see stree_apply().
+            self.mutation_notify('treeNode_metaSet', self.l_cwd[:],
+                                 self.b_printMetaData)
             return True
 
         def treeRecurse(self, afunc_nodeEval = None, astr_startPath = '/'):
@@ -0,0 +1,239 @@
+#!/usr/bin/env python
+"""
+    NAME
+
+        C_streeAsync
+
+    DESCRIPTION
+
+        'C_streeAsync' is a facade over a C_stree for populating (and
+        reading) the tree from many concurrent, slow sources -- network
+        listings, database cursors and the like.
+
+        Its verbs take absolute paths and never depend on, or change,
+        the cwd of the tree, so any number of threads can call them at
+        once; each call holds the tree lock only for as long as it takes.
+
+        ingest() consumes a set of record sources with bounded
+        concurrency: each source is drained by its own producer thread
+        into a bounded queue (so fast producers block rather than pile
+        up records), while the calling thread applies the records to the
+        tree in chunks, one C_stree.batch() per chunk. The lock is
+        released between chunks, so readers are never held up by a
+        large insert for longer than one chunk.
+
+    NOTES
+
+        The tree runs on Python 2, which has no asyncio; concurrency is
+        provided by threads, which is what a blocking source needs.
+
+    HISTORY
+
+        19 October 2026
+        o Initial design and coding.
+
+"""
+
+# System modules
+import  sys
+import  threading
+import  Queue
+
+from    C_snode         import  *
+
+class C_streeAsync:
+        """
+        A thread-safe, absolute-path facade over a C_stree with a
+        concurrent bulk ingest.
+        """
+
+        def __init__(self, astree, **kwargs):
+            '''
+            Wrap <astree>.
+
+            Optional kwargs:
+
+                concurrency = <n>   sources drained at once (default 8)
+                queueSize   = <n>   records buffered between the sources
+                                    and the tree (default 4096)
+                chunk       = <n>   records applied per batch
+                                    (default 256)
+            '''
+            self.str_obj                = 'C_streeAsync'
+            self.stree                  = astree
+            self._concurrency           = 8
+            self._queueSize             = 4096
+            self._chunk                 = 256
+            for key, val in kwargs.iteritems():
+                if key == 'concurrency':    self._concurrency   = val
+                if key == 'queueSize':      self._queueSize     = val
+                if key == 'chunk':          self._chunk         = val
+
+        #
+        # Verbs. Each holds the tree lock and leaves the cwd as it was.
+
+        def mkpath(self, astr_path):
+            '''
+            Create the node at the absolute <astr_path>, along with any
+            missing ancestors (like 'mkdir -p').
+            '''
+            self.stree.lock.acquire()
+            str_cwd     = self.stree.cwd()
+            try:
+                self.path_make(self.stree.l_pathAbs(astr_path))
+            finally:
+                self.stree.cdnode(str_cwd)
+                self.stree.lock.release()
+            return True
+
+        def touch(self, astr_path, astr_name, adata):
+            '''
+            Set <astr_name> to <adata> in the node at <astr_path>, creating
+            the node if needed.
+            '''
+            return self.touch_data(astr_path, {astr_name: adata})
+
+        def touch_data(self, astr_path, ad_data):
+            '''
+            Set the items of <ad_data> in the node at <astr_path>, creating
+            the node if needed.
+            '''
+            self.stree.lock.acquire()
+            str_cwd     = self.stree.cwd()
+            try:
+                self.record_apply(astr_path, ad_data)
+            finally:
+                self.stree.cdnode(str_cwd)
+                self.stree.lock.release()
+            return True
+
+        def cat(self, astr_path, astr_name):
+            '''
+            Return the <astr_name> data of the node at <astr_path>.
+            '''
+            self.stree.lock.acquire()
+            try:
+                snode   = self.stree.snode_find(astr_path)
+                if snode is None: raise KeyError(astr_path)
+                return snode.d_data[astr_name]
+            finally:
+                self.stree.lock.release()
+
+        def ls(self, astr_path, **kwargs):
+            '''
+            Return the (paged, see C_stree.lstr_nodePage()) child names and
+            the data dictionary of the node at <astr_path>.
+            '''
+            self.stree.lock.acquire()
+            try:
+                snode   = self.stree.snode_find(astr_path)
+                if snode is None: raise KeyError(astr_path)
+                return self.stree.lstr_nodePage(snode, **kwargs), \
+                       dict(snode.d_data)
+            finally:
+                self.stree.lock.release()
+
+        #
+        # Record application. Called with the tree lock held; these move
+        # the cwd, which the callers restore.
+
+        def path_make(self, al_path):
+            '''
+            Create any missing nodes along the absolute path list
+            <al_path>, and cd there.
+            '''
+            for depth in range(1, len(al_path)):
+                if not self.stree.b_pathOK(al_path[:depth + 1]):
+                    self.stree.cdnode('/' + '/'.join(al_path[1:depth]))
+                    self.stree.mknode([al_path[depth]])
+            self.stree.cdnode('/' + '/'.join(al_path[1:]))
+
+        def record_apply(self, astr_path, ad_data):
+            self.path_make(self.stree.l_pathAbs(astr_path))
+            if ad_data:
+                for key, value in ad_data.iteritems():
+                    self.stree.touch(key, value)
+
+        #
+        # Bulk ingest
+
+        def ingest(self, al_sources):
+            '''
+            Drain the iterables <al_sources> into the tree, at most
+            'concurrency' of them at a time. Each source yields records
+
+                (astr_path, ad_data)
+
+            with <ad_data> a dictionary of items to touch into the node at
+            the absolute path <astr_path> (created if needed), or None.
+
+            Returns the number of records applied. If a source raises, or
+            a record cannot be applied, the ingest stops and the exception
+            is raised here, after the producers have finished; chunks
+            already applied are kept.
+            '''
+            queue_records   = Queue.Queue(self._queueSize)
+            queue_sources   = Queue.Queue()
+            for source in al_sources: queue_sources.put(source)
+            l_error         = []
+            event_stop      = threading.Event()
+            str_done        = 'done'    # end-of-producer marker
+
+            def producer():
+                try:
+                    while not event_stop.is_set():
+                        try:                source = queue_sources.get_nowait()
+                        except Queue.Empty: break
+                        for t_record in source:
+                            if event_stop.is_set(): break
+                            queue_records.put(t_record)
+                except Exception:
+                    l_error.append(sys.exc_info())
+                    event_stop.set()
+                finally:
+                    queue_records.put(str_done)
+
+            l_thread        = []
+            for i in range(max(1, min(self._concurrency,
+                                      queue_sources.qsize()))):
+                thread          = threading.Thread(target = producer)
+                thread.daemon   = True
+                thread.start()
+                l_thread.append(thread)
+
+            applied         = 0
+            running         = len(l_thread)
+            l_chunk         = []
+            try:
+                while running:
+                    t_record    = queue_records.get()
+                    if t_record is str_done:
+                        running    -= 1
+                    elif not event_stop.is_set():
+                        l_chunk.append(t_record)
+                    if len(l_chunk) >= self._chunk or \
+                       (len(l_chunk) and (not running or queue_records.empty())):
+                        applied    += self.chunk_apply(l_chunk)
+                        l_chunk     = []
+            finally:
+                # Should a chunk fail, stop the producers, and drain the
+                #+ queue so that none stays blocked on a full queue.
+                event_stop.set()
+                while running:
+                    if queue_records.get() is str_done: running -= 1
+                for thread in l_thread: thread.join()
+            if len(l_error):
+                t_error     = l_error[0]
+                raise t_error[0], t_error[1], t_error[2]
+            return applied
+
+        def chunk_apply(self, al_chunk):
+            '''
+            Apply a chunk of records as one batch.
+            '''
+            with self.stree.batch():
+                str_cwd = self.stree.cwd()
+                for str_path, d_data in al_chunk:
+                    self.record_apply(str_path, d_data)
+                self.stree.cdnode(str_cwd)
+            return len(al_chunk)
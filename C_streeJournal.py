@@ -0,0 +1,382 @@
+#!/usr/bin/env python
+"""
+    NAME
+
+        C_streeJournal, C_streeJournalTail
+
+    DESCRIPTION
+
+        'C_streeJournal' keeps a write-ahead journal of the mutations
+        made to a C_stree. Each mutation reported by the tree (see
+        C_stree.mutationHook_add()) is appended to a journal segment
+        as a length-prefixed pickle record. Records are buffered and
+        written in batches, once 'batch' records are buffered or the
+        oldest has waited 'maxAge' seconds (a timer thread writes the
+        tail of a burst, so a quiet tree does not leave a tail replica
+        behind), and on checkpoint() and detach(); whether (and how
+        often) the segment is fsync'd is configurable.
+
+        A checkpoint compacts the journal: the full tree is dumped to
+        '<base>.checkpoint' (atomically, via a rename) and a new journal
+        segment '<base>.journal.<generation>' is started. On startup,
+        stree_recover() loads the last checkpoint and replays only the
+        tail of the journal.
+
+        'C_streeJournalTail' follows the journal from another process,
+        keeping a read replica of the tree up to date incrementally.
+
+    NOTES
+
+        Files, for a journal with base name <base>:
+
+            <base>.checkpoint           the last checkpoint
+            <base>.journal.<gen>        the records after checkpoint <gen>
+
+        The segment preceding the current one is kept until the next
+        checkpoint, so that a lagging tail can still drain it.
+
+    HISTORY
+
+        19 October 2026
+        o Initial design and coding.
+
+"""
+
+# System modules
+import  os
+import  sys
+import  struct
+import  threading
+import  cPickle         as      pickle
+
+from    C_snode         import  *
+
+# Length prefix of each journal record
+str_recordHeader        = '>I'
+recordHeaderLength      = struct.calcsize(str_recordHeader)
+
+def str_pathFromList(al_path):
+    '''
+    Convert a path list ['/', 'node1', 'node2'] to the string
+    '/node1/node2'.
+    '''
+    return '/' + '/'.join(al_path[1:])
+
+def stree_apply(astree, astr_verb, al_path, t_args):
+    '''
+    Apply the mutation <astr_verb>(*<t_args>) at <al_path> to <astree>,
+    leaving the cwd of the tree unchanged.
+    '''
+    str_cwd     = astree.cwd()
+    astree.cdnode(str_pathFromList(al_path))
+    if astr_verb == 'treeNode_metaSet':
+        # Recorded with the flag set on the node, not the tree flag
+        b_printMetaData         = astree.b_printMetaData
+        astree.b_printMetaData  = t_args[0]
+        astree.treeNode_metaSet(str_pathFromList(al_path))
+        astree.b_printMetaData  = b_printMetaData
+    else:
+        getattr(astree, astr_verb)(*t_args)
+    astree.cdnode(str_cwd)
+
+def checkpoint_read(astr_base):
+    '''
+    Return the checkpoint dictionary stored for <astr_base>, or None
+    if there is none.
+    '''
+    str_file    = '%s.checkpoint' % astr_base
+    if not os.path.exists(str_file): return None
+    f = open(str_file, 'rb')
+    try:        d_checkpoint    = pickle.load(f)
+    finally:    f.close()
+    return d_checkpoint
+
+def l_recordsRead(astr_file, a_offset):
+    '''
+    Read the complete records of the journal segment <astr_file> from
+    byte <a_offset> on. A trailing, partially written, record is left
+    alone.
+
+    Returns the list of records and the offset just past the last
+    complete record.
+    '''
+    l_records   = []
+    if not os.path.exists(astr_file): return l_records, a_offset
+    f = open(astr_file, 'rb')
+    try:
+        f.seek(a_offset)
+        while True:
+            str_header  = f.read(recordHeaderLength)
+            if len(str_header) < recordHeaderLength: break
+            length,     = struct.unpack(str_recordHeader, str_header)
+            str_record  = f.read(length)
+            if len(str_record) < length: break
+            l_records.append(pickle.loads(str_record))
+            a_offset   += recordHeaderLength + length
+    finally:
+        f.close()
+    return l_records, a_offset
+
+class C_streeJournal:
+        """
+        An append-only journal of the mutations of a C_stree, with
+        periodic compaction into a checkpoint.
+        """
+
+        def __init__(self, astr_base, **kwargs):
+            '''
+            Create a journal stored under the base file name <astr_base>.
+
+            Optional kwargs:
+
+                batch           = <n>   records buffered before a write
+                                        (default 64)
+                fsync           = 'always' | 'batch' | 'never'
+                                        fsync after each record, after
+                                        each batch write (default), or
+                                        leave it to the OS
+                checkpointEvery = <n>   write a checkpoint after every
+                                        <n> records (default 0: only on
+                                        request)
+                maxAge          = <s>   write buffered records at most
+                                        <s> seconds after the first of
+                                        them (default 1.0; 0: only when
+                                        'batch' records are buffered)
+            '''
+            self.str_obj                = 'C_streeJournal'
+            self.str_base               = astr_base
+            self._batch                 = 64
+            self.str_fsync              = 'batch'
+            self._checkpointEvery       = 0
+            self.f_maxAge               = 1.0
+            for key, val in kwargs.iteritems():
+                if key == 'maxAge':             self.f_maxAge           = val
+                if key == 'batch':              self._batch             = val
+                if key == 'fsync':              self.str_fsync          = val
+                if key == 'checkpointEvery':    self._checkpointEvery   = val
+            if self.str_fsync not in ['always', 'batch', 'never']:
+                self.error_exit('creating the journal',
+                                'unknown fsync mode "%s"' % self.str_fsync, 1)
+            if self.str_fsync == 'always': self._batch = 1
+
+            self.stree                  = None
+            self._gen                   = 0     # current journal segment
+            self._seq                   = 0     # last record sequence number
+            self._sinceCheckpoint       = 0
+            self.l_buffer               = []
+            self.f_journal              = None
+            self.lock                   = threading.RLock()
+                                                # guards the buffer and file
+            self.timer                  = None  # pending maxAge write
+
+        #
+        # Simple error handling
+        def error_exit(self, astr_action, astr_error, astr_code):
+            print("%s: FATAL error occurred"                % self.str_obj)
+            print("While %s,"                               % astr_action)
+            print("%s"                                      % astr_error)
+            print("\nReturning to system with code %s\n"    % astr_code)
+            sys.exit(astr_code)
+
+        def str_journalFile(self, a_gen = None):
+            if a_gen is None: a_gen = self._gen
+            return '%s.journal.%d' % (self.str_base, a_gen)
+
+        def str_checkpointFile(self):
+            return '%s.checkpoint' % self.str_base
+
+        def attach(self, astree):
+            '''
+            Start journaling the mutations of <astree>, appending to the
+            current journal segment.
+            '''
+            self.stree                  = astree
+            self.f_journal              = open(self.str_journalFile(), 'ab')
+            astree.mutationHook_add(self.record)
+
+        def detach(self):
+            '''
+            Flush outstanding records and stop journaling.
+            '''
+            if self.stree is None: return
+            self.stree.mutationHook_remove(self.record)
+            with self.lock:
+                self.flush()
+                self.f_journal.close()
+                self.f_journal          = None
+                self.stree              = None
+
+        def record(self, astr_verb, al_path, *args):
+            '''
+            The C_stree mutation hook: buffer a record of the mutation.
+            The record is pickled immediately, so later in-place changes
+            to its arguments do not leak into the journal.
+            '''
+            with self.lock:
+                self._seq              += 1
+                str_record  = pickle.dumps((self._seq, astr_verb, al_path, args),
+                                           pickle.HIGHEST_PROTOCOL)
+                self.l_buffer.append(struct.pack(str_recordHeader,
+                                                 len(str_record)))
+                self.l_buffer.append(str_record)
+                self._sinceCheckpoint  += 1
+                if len(self.l_buffer) >= 2 * self._batch:
+                    self.flush()
+                elif self.f_maxAge and self.timer is None:
+                    self.timer          = threading.Timer(self.f_maxAge,
+                                                          self.flush)
+                    self.timer.daemon   = True
+                    self.timer.start()
+                if self._checkpointEvery and \
+                   self._sinceCheckpoint >= self._checkpointEvery:
+                    self.checkpoint()
+
+        def flush(self):
+            '''
+            Write the buffered records to the journal segment.
+            '''
+            with self.lock:
+                if self.timer is not None: self.timer.cancel()
+                self.timer              = None
+                if not len(self.l_buffer) or self.f_journal is None: return
+                self.f_journal.write(''.join(self.l_buffer))
+                self.l_buffer           = []
+                self.f_journal.flush()
+                if self.str_fsync != 'never':
+                    os.fsync(self.f_journal.fileno())
+
+        def checkpoint(self):
+            '''
+            Compact the journal: dump the tree to a new checkpoint and
+            start a new, empty, journal segment.
+
+            While a batch commit passes its events on, the tree already
+            shows the mutations of the events still to come; the
+            checkpoint is stamped with the sequence number of the last of
+            them, so that their records are skipped on recovery.
+            '''
+            with self.lock:
+                self.flush()
+                d_checkpoint = {'gen':  self._gen + 1,
+                                'seq':  self._seq + self.stree._eventsAhead,
+                                'tree': self.stree.d_dump()}
+                str_tmp     = self.str_checkpointFile() + '.tmp'
+                f = open(str_tmp, 'wb')
+                try:
+                    pickle.dump(d_checkpoint, f, pickle.HIGHEST_PROTOCOL)
+                    f.flush()
+                    os.fsync(f.fileno())
+                finally:
+                    f.close()
+                os.rename(str_tmp, self.str_checkpointFile())
+                self.f_journal.close()
+                self._gen              += 1
+                self.f_journal          = open(self.str_journalFile(), 'ab')
+                self._sinceCheckpoint   = 0
+                str_stale   = self.str_journalFile(self._gen - 2)
+                if os.path.exists(str_stale): os.remove(str_stale)
+
+        def stree_recover(self, **kwargs):
+            '''
+            Rebuild the journaled tree: load the last checkpoint (if any)
+            and replay the tail of the journal. A partially written
+            trailing record, left by a crash, is discarded.
+
+            The journal is then attached to the recovered tree, which is
+            returned. The kwargs are passed to the C_stree constructor
+            when there is no checkpoint.
+            '''
+            stree       = C_stree(**kwargs)
+            d_checkpoint = checkpoint_read(self.str_base)
+            if d_checkpoint is not None:
+                stree.tree_load(d_checkpoint['tree'])
+                self._gen               = d_checkpoint['gen']
+                self._seq               = d_checkpoint['seq']
+            str_file    = self.str_journalFile()
+            l_records, offset = l_recordsRead(str_file, 0)
+            for seq, str_verb, l_path, t_args in l_records:
+                if seq <= self._seq: continue
+                stree_apply(stree, str_verb, l_path, t_args)
+                self._seq               = seq
+            self._sinceCheckpoint       = len(l_records)
+            if os.path.exists(str_file) and os.path.getsize(str_file) > offset:
+                f = open(str_file, 'r+b')
+                try:        f.truncate(offset)
+                finally:    f.close()
+            self.attach(stree)
+            return stree
+
+class C_streeJournalTail:
+        """
+        Follows the journal written by a C_streeJournal (typically in
+        another process) and keeps a replica C_stree up to date.
+        """
+
+        def __init__(self, astr_base, **kwargs):
+            '''
+            Follow the journal with base file name <astr_base>. The kwargs
+            are passed to the C_stree constructor of the replica.
+            '''
+            self.str_obj                = 'C_streeJournalTail'
+            self.str_base               = astr_base
+            self.d_treeArgs             = kwargs
+            self.stree                  = None
+            self._gen                   = 0
+            self._seq                   = 0
+            self._offset                = 0
+            self.checkpoint_load()
+
+        def str_journalFile(self, a_gen):
+            return '%s.journal.%d' % (self.str_base, a_gen)
+
+        def checkpoint_load(self):
+            '''
+            (Re)build the replica from the last checkpoint.
+            '''
+            self.stree                  = C_stree(**self.d_treeArgs)
+            self._gen                   = 0
+            self._seq                   = 0
+            self._offset                = 0
+            d_checkpoint = checkpoint_read(self.str_base)
+            if d_checkpoint is not None:
+                self.stree.tree_load(d_checkpoint['tree'])
+                self._gen               = d_checkpoint['gen']
+                self._seq               = d_checkpoint['seq']
+
+        def segment_drain(self):
+            '''
+            Apply the new complete records of the current segment.
+            '''
+            applied     = 0
+            l_records, self._offset = l_recordsRead(
+                                        self.str_journalFile(self._gen),
+                                        self._offset)
+            for seq, str_verb, l_path, t_args in l_records:
+                if seq <= self._seq: continue
+                stree_apply(self.stree, str_verb, l_path, t_args)
+                self._seq           = seq
+                applied            += 1
+            return applied
+
+        def poll(self):
+            '''
+            Apply any new journal records to the replica. Returns the
+            number of records applied.
+            '''
+            applied     = 0
+            while True:
+                b_next              = os.path.exists(
+                                        self.str_journalFile(self._gen + 1))
+                if b_next and \
+                   not os.path.exists(self.str_journalFile(self._gen)):
+                    # We fell behind a compaction; start over from the
+                    # checkpoint.
+                    self.checkpoint_load()
+                    continue
+                applied            += self.segment_drain()
+                if not b_next: break
+                # The writer had already moved on to the next segment
+                # before we drained this one, so it is complete.
+                self._gen          += 1
+                self._offset        = 0
+            return applied
@@ -0,0 +1,261 @@
+#!/usr/bin/env python
+"""
+    NAME
+
+        C_streeOverlay
+
+    DESCRIPTION
+
+        'C_streeOverlay' stacks a small, writable C_stree on top of one
+        or more read-only C_stree layers, in the manner of a union mount.
+        The layers are shared, not copied: an overlay starts out empty,
+        so creating one is O(1), and it only grows with the changes made
+        through it.
+
+        A path exists in the overlay if it exists in the upper tree or in
+        any lower layer. Node listings are the union of the listings of
+        the layers, and data items are looked up in the upper tree first,
+        then in the lower layers, top down. Writes (mknode, touch) go to
+        the upper tree, which first gets empty copies of the nodes on the
+        path that so far only exist below. Removing a node (rmnode)
+        deletes it from the upper tree and records a whiteout, which
+        hides the path, and everything below it, in the lower layers. A
+        node created again over a whiteout starts out empty.
+
+    NOTES
+
+        The lower layers must not be changed while overlays use them;
+        the overlay itself only reads them (see C_stree.snode_peek()),
+        so one base can be shared by overlays in several threads.
+        The upper tree is an ordinary C_stree (overlay.stree_upper), so
+        its mutation hooks (journal, watches, ...) see the changes made
+        through the overlay, whiteouts included: these are reported as
+        an rmnode at the (copied up) parent of the hidden node.
+
+    HISTORY
+
+        19 October 2026
+        o Initial design and coding.
+
+"""
+
+# System modules
+import  sys
+
+from    C_snode         import  *
+
+class C_streeOverlay:
+        """
+        A writable C_stree stacked over read-only C_stree layers.
+        """
+
+        def __init__(self, al_lower, **kwargs):
+            '''
+            Stack an empty, writable tree on top of the list of C_stree
+            layers <al_lower>, topmost first. The kwargs are passed to the
+            C_stree constructor of the upper tree.
+            '''
+            self.str_obj                = 'C_streeOverlay'
+            self.l_lower                = list(al_lower)
+            self.stree_upper            = C_stree(**kwargs)
+            self.s_whiteout             = set()     # hidden path tuples
+            self.l_cwd                  = ['/']
+
+        #
+        # Simple error handling
+        def error_exit(self, astr_action, astr_error, astr_code):
+            print("%s: FATAL error occurred"                % self.str_obj)
+            print("While %s,"                               % astr_action)
+            print("%s"                                      % astr_error)
+            print("\nReturning to system with code %s\n"    % astr_code)
+            sys.exit(astr_code)
+
+        @staticmethod
+        def str_path(al_path):
+            return '/' + '/'.join(al_path[1:])
+
+        def l_pathAbs(self, astr_path):
+            '''
+            Return the absolute path list of <astr_path> (default: the
+            cwd), see C_stree.l_pathAbs().
+            '''
+            if not len(astr_path): return self.l_cwd[:]
+            if astr_path[:1] == '/':    l_path  = ['/']
+            else:                       l_path  = self.l_cwd[:]
+            for node in astr_path.split('/'):
+                if not len(node) or node == '.': continue
+                if node == '..':
+                    if len(l_path) > 1: l_path.pop()
+                    continue
+                l_path.append(node)
+            return l_path
+
+        #
+        # Layer resolution
+
+        def b_whiteout(self, al_path):
+            '''
+            Return whether <al_path> is hidden in the lower layers.
+            '''
+            if not len(self.s_whiteout): return False
+            for depth in range(2, len(al_path) + 1):
+                if tuple(al_path[:depth]) in self.s_whiteout: return True
+            return False
+
+        def l_snodeLayers(self, al_path):
+            '''
+            Return the nodes at <al_path> of each layer that shows it,
+            topmost (the upper tree) first.
+            '''
+            str_path    = C_streeOverlay.str_path(al_path)
+            l_snode     = []
+            snode       = self.stree_upper.snode_find(str_path)
+            if snode is not None: l_snode.append(snode)
+            if self.b_whiteout(al_path): return l_snode
+            for stree in self.l_lower:
+                snode   = stree.snode_peek(al_path)
+                if snode is not None: l_snode.append(snode)
+            return l_snode
+
+        def b_pathOK(self, al_path):
+            '''
+            Check whether the absolute path list <al_path> exists in the
+            overlay.
+            '''
+            if len(al_path) == 1: return True
+            if self.stree_upper.b_pathOK(al_path): return True
+            if self.b_whiteout(al_path): return False
+            for stree in self.l_lower:
+                if stree.b_pathOK(al_path): return True
+            return False
+
+        def path_copyUp(self, al_path):
+            '''
+            Make sure the node at <al_path> (which exists in the overlay)
+            exists in the upper tree, creating empty nodes as needed, and
+            cd the upper tree there.
+            '''
+            stree       = self.stree_upper
+            for depth in range(1, len(al_path)):
+                if not stree.b_pathOK(al_path[:depth + 1]):
+                    stree.cdnode(C_streeOverlay.str_path(al_path[:depth]))
+                    stree.mknode([al_path[depth]])
+            stree.cdnode(C_streeOverlay.str_path(al_path))
+
+        #
+        # Navigation and reading
+
+        def cdnode(self, astr_path):
+            '''
+            Change the working node to <astr_path>. Returns the cwd path
+            list, unchanged if there is no such node.
+            '''
+            l_path      = self.l_pathAbs(astr_path)
+            if self.b_pathOK(l_path): self.l_cwd = l_path
+            return self.l_cwd
+
+        def cwd(self):
+            return C_streeOverlay.str_path(self.l_cwd)
+
+        def pwd(self):
+            return self.cwd()
+
+        def lstr_lsnode(self, astr_path = ""):
+            '''
+            Return the names of the children of the node at <astr_path>
+            (default: the cwd), lowest layer first.
+            '''
+            l_path      = self.l_pathAbs(astr_path)
+            lstr_nodes  = []
+            s_nodes     = set()
+            for snode in reversed(self.l_snodeLayers(l_path)):
+                for node in snode.d_nodes.keys():
+                    if node in s_nodes: continue
+                    if not self.b_pathOK(l_path + [node]): continue
+                    s_nodes.add(node)
+                    lstr_nodes.append(node)
+            if self.stree_upper.str_childOrder == 'sorted': lstr_nodes.sort()
+            return lstr_nodes
+
+        def d_data(self, astr_path = ""):
+            '''
+            Return the merged data dictionary of the node at <astr_path>
+            (default: the cwd); upper layers win.
+            '''
+            d_data      = {}
+            for snode in reversed(self.l_snodeLayers(self.l_pathAbs(astr_path))):
+                d_data.update(snode.d_data)
+            return d_data
+
+        def ls(self, astr_path = ""):
+            '''
+            Return the child names and the merged data of the node at
+            <astr_path> (default: the cwd).
+            '''
+            return self.lstr_lsnode(astr_path), self.d_data(astr_path)
+
+        def cat(self, name):
+            '''
+            Return the 'name'd data item of the current node.
+            '''
+            for snode in self.l_snodeLayers(self.l_cwd):
+                if name in snode.d_data: return snode.d_data[name]
+            raise KeyError(name)
+
+        def treeRecurse(self, afunc_nodeEval = None, astr_startPath = '/'):
+            """
+            Recursively walk through the overlay, starting from node
+            <astr_startPath>, see C_stree.treeRecurse().
+            """
+            b_valid     = self.b_pathOK(self.l_pathAbs(astr_startPath))
+            if b_valid and afunc_nodeEval:
+                b_valid = afunc_nodeEval(astr_startPath)
+            if b_valid:
+                for node in self.lstr_lsnode(astr_startPath):
+                    if astr_startPath == '/': recursePath = "/%s" % node
+                    else: recursePath = '%s/%s' % (astr_startPath, node)
+                    self.treeRecurse(afunc_nodeEval, recursePath)
+
+        #
+        # Writing
+
+        def mknode(self, al_branchNodes):
+            '''
+            Create the nodes <al_branchNodes> at the current node, in the
+            upper tree. Nodes that already exist are left alone.
+            '''
+            l_new       = [node for node in al_branchNodes
+                                if not self.b_pathOK(self.l_cwd + [node])]
+            if not len(l_new): return True
+            self.path_copyUp(self.l_cwd)
+            return self.stree_upper.mknode(l_new)
+
+        def touch(self, name, data):
+            '''
+            Set the 'name'd data item of the current node, in the upper
+            tree.
+            '''
+            self.path_copyUp(self.l_cwd)
+            return self.stree_upper.touch(name, data)
+
+        def rmnode(self, astr_path):
+            '''
+            Remove the node at <astr_path> and its subtree: delete it from
+            the upper tree and hide it in the lower layers. The cwd moves
+            up if it was inside the removed subtree.
+            '''
+            l_path      = self.l_pathAbs(astr_path)
+            if len(l_path) < 2 or not self.b_pathOK(l_path): return False
+            stree       = self.stree_upper
+            self.path_copyUp(l_path[:-1])
+            if not stree.rmnode(l_path[-1]):
+                # Only the lower layers have the node: the whiteout is the
+                #+ removal, and the hooks of the upper tree hear about it
+                #+ as one.
+                stree.mutation_notify('rmnode', l_path[:-1], l_path[-1])
+            for lower in self.l_lower:
+                if lower.b_pathOK(l_path):
+                    self.s_whiteout.add(tuple(l_path))
+                    break
+            if self.l_cwd[:len(l_path)] == l_path: self.l_cwd = l_path[:-1]
+            return True
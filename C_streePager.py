@@ -0,0 +1,399 @@
+#!/usr/bin/env python
+"""
+    NAME
+
+        C_streePager, C_pagedNodes
+
+    DESCRIPTION
+
+        'C_streePager' lets a C_stree grow beyond the memory it may use
+        by paging cold subtrees out to a local on-disk store.
+
+        The tree is cut into pages at a fixed depth: each node at that
+        depth, with its subtree, is one page. The pager keeps the pages
+        in least-recently-used order and, once the number of resident
+        nodes exceeds its budget, spills the least recently used pages
+        to disk. A spilled page keeps its root node in memory, but the
+        children of that node are replaced by a 'C_pagedNodes' stub.
+
+        The stub is a mapping that loads the page back in on first use,
+        so that cdnode, cat, ls, printing and traversals fault spilled
+        pages in transparently. The paths below a spilled page are taken
+        out of the path index of the tree (l_allPaths / s_allPaths) as
+        well, and put back when the page comes in again; a path check
+        (C_stree.b_pathOK()) that falls into a spilled page pages it in.
+
+    NOTES
+
+        The budget is counted in nodes, the unit that dominates the
+        memory of a tree. Pages that hold the cwd, or whose root or
+        ancestors are shared (see C_stree.subtrees_intern()), are never
+        spilled, and nothing is spilled while a batch (C_stree.batch())
+        is open. A paged tree is not path compressed
+        (C_stree.nodes_compress()).
+
+        The page sizes follow the mknode and rmnode mutations of the
+        tree; a mutation that the pager does not know to leave the
+        shape of the tree alone makes it recount all resident pages.
+        Spilling pages filters the path list of the tree, which takes
+        time in the number of paths, once per enforce() that spills.
+        Pages that come back in append their paths to l_allPaths, so
+        ptree() lists them last. The render cache of the tree (see
+        C_stree.renderCache()) only holds weak references to nodes, so
+        it does not keep spilled pages in memory.
+
+    HISTORY
+
+        19 October 2026
+        o Initial design and coding.
+
+"""
+
+# System modules
+import  os
+import  sys
+import  shelve
+import  collections
+
+from    C_snode         import  *
+
+# Files that the dbm modules behind shelve may create for a store name
+lstr_storeSuffix        = ['', '.db', '.dat', '.dir', '.bak', '.pag']
+
+class C_pagedNodes(object):
+        '''
+        Stands in for the d_nodes of a node whose subtree has been paged
+        out. Any use of it pages the subtree back in and is passed on to
+        the restored children container.
+
+        The stub holds the container rather than being a dictionary
+        itself, so that no operation (dict.update(), ** expansion, ...)
+        can read its own, empty, contents by way of a built-in fast path.
+        '''
+
+        def __init__(self, apager, asnode, astr_key):
+            self.pager                  = apager
+            self.snode                  = asnode
+            self.str_key                = astr_key
+
+        def d_nodes(self):
+            '''
+            Return the real children container, paging it in if needed.
+            '''
+            if self.snode.d_nodes is self: self.pager.page_in(self.snode)
+            return self.snode.d_nodes
+
+        def __getattr__(self, astr_attr):
+            # Only called for the attributes not found on the stub
+            if astr_attr in ['pager', 'snode', 'str_key']:
+                raise AttributeError(astr_attr)
+            return getattr(self.d_nodes(), astr_attr)
+
+def method_delegate(astr_method):
+    def method(self, *args, **kwargs):
+        return getattr(self.d_nodes(), astr_method)(*args, **kwargs)
+    method.__name__     = astr_method
+    return method
+
+for str_method in ['__getitem__', '__setitem__', '__delitem__', '__contains__',
+                   '__iter__', '__len__', '__eq__', '__ne__', '__repr__',
+                   'get', 'has_key', 'keys', 'values', 'items', 'iterkeys',
+                   'itervalues', 'iteritems', 'update', 'pop', 'popitem',
+                   'setdefault', 'clear', 'copy']:
+    setattr(C_pagedNodes, str_method, method_delegate(str_method))
+
+class C_streePager:
+        """
+        Pages the subtrees of a C_stree in and out of memory under a
+        node budget.
+        """
+
+        def __init__(self, astree, astr_store, **kwargs):
+            '''
+            Page <astree>, spilling to the store file <astr_store>.
+
+            Optional kwargs:
+
+                budget    = <n>     resident nodes to allow
+                                    (default 1000000)
+                pageDepth = <n>     depth of the page root nodes
+                                    (default 1)
+            '''
+            self.str_obj                = 'C_streePager'
+            self.stree                  = astree
+            self.str_store              = astr_store
+            self._budget                = 1000000
+            self._pageDepth             = 1
+            for key, val in kwargs.iteritems():
+                if key == 'budget':     self._budget    = val
+                if key == 'pageDepth':  self._pageDepth = val
+            if self._pageDepth < 1:
+                self.error_exit('creating the pager',
+                                'the page depth must be at least 1', 1)
+
+            self.shelf                  = shelve.open(astr_store, 'n',
+                                                      protocol = 2)
+            self._pageKey               = 0
+            self.d_resident             = collections.OrderedDict()
+                                                    # id -> [snode, size,
+                                                    #+ path tuple], LRU
+            self.d_spilled              = {}        # store key -> [page root,
+                                                    #+ path tuple]
+            self.d_spilledPath          = {}        # path tuple -> store key
+            self._resident              = 0
+            self._hits                  = 0
+            self._misses                = 0
+            self._evictions             = 0
+
+            # Pages are cut at a fixed depth, so compressed edges, which
+            #+ span depths, are unfolded first.
+            astree.nodes_expand()
+            self.pages_register(astree.snode_root, ('/',))
+            astree.pager                = self
+            astree.mutationHook_add(self.mutation)
+            self.enforce()
+
+        #
+        # Simple error handling
+        def error_exit(self, astr_action, astr_error, astr_code):
+            print("%s: FATAL error occurred"                % self.str_obj)
+            print("While %s,"                               % astr_action)
+            print("%s"                                      % astr_error)
+            print("\nReturning to system with code %s\n"    % astr_code)
+            sys.exit(astr_code)
+
+        def pages_register(self, asnode, at_path):
+            '''
+            Register the (resident) pages at and below <asnode>, which is
+            at the path tuple <at_path>.
+            '''
+            if len(at_path) - 1 == self._pageDepth:
+                self.page_register(asnode, at_path)
+                return
+            for node in asnode.d_nodes.keys():
+                self.pages_register(asnode.d_nodes[node], at_path + (node,))
+
+        def page_register(self, asnode, at_path):
+            if id(asnode) in self.d_resident: return
+            if isinstance(asnode.d_nodes, C_pagedNodes): return
+            self.stree.label_update(asnode)
+            self.d_resident[id(asnode)] = [asnode, asnode._size, at_path]
+            self._resident             += asnode._size
+
+        def page_resize(self, asnode):
+            '''
+            Account for a change in the size of the resident page rooted
+            at <asnode>.
+            '''
+            l_page      = self.d_resident.get(id(asnode))
+            if l_page is None: return
+            self.stree.label_update(asnode)
+            self._resident             += asnode._size - l_page[1]
+            l_page[1]                   = asnode._size
+
+        def snode_access(self, al_chain):
+            '''
+            Called by the tree with the chain of nodes to each node it
+            resolves: mark the page as recently used, and page the node
+            itself in so that it can be listed.
+            '''
+            if len(al_chain) > self._pageDepth:
+                snode   = al_chain[self._pageDepth]
+                l_page  = self.d_resident.pop(id(snode), None)
+                if l_page is not None:
+                    self.d_resident[id(snode)]  = l_page
+                    self._hits         += 1
+                elif not isinstance(snode.d_nodes, C_pagedNodes):
+                    self.page_register(snode, tuple(['/'] +
+                                        [snode_page.str_nodeName for snode_page
+                                            in al_chain[1:self._pageDepth + 1]]))
+            d_nodes     = al_chain[-1].d_nodes
+            if isinstance(d_nodes, C_pagedNodes): d_nodes.d_nodes()
+
+        def b_pathSpilled(self, al_path):
+            '''
+            Check whether the absolute path list <al_path>, which is not in
+            the path index of the tree, lies in a spilled page, and if so
+            page it in and check again.
+            '''
+            depth       = self._pageDepth + 1
+            if len(al_path) <= depth: return False
+            str_key     = self.d_spilledPath.get(tuple(al_path[:depth]))
+            if str_key is None: return False
+            self.page_in(self.d_spilled[str_key][0])
+            return tuple(al_path) in self.stree.s_allPaths
+
+        #
+        # The mutations that leave the shape of the tree alone.
+        l_dataVerb      = ['touch', 'prop_set', 'prop_unset', 'node_hitCount',
+                           'node_mustInclude', 'node_mustNotInclude',
+                           'tree_metaData_print', 'treeNode_metaSet']
+
+        def mutation(self, astr_verb, al_path, *args):
+            '''
+            The C_stree mutation hook: keep the page sizes current.
+            '''
+            if astr_verb in C_streePager.l_dataVerb: return
+            depth       = len(al_path) - 1
+            if astr_verb not in ['mknode', 'rmnode']:
+                self.pages_recount()
+                return
+            if astr_verb == 'rmnode' and depth < self._pageDepth:
+                self.pages_prune()
+                return
+            if depth + 1 < self._pageDepth: return
+            l_chain     = self.stree.l_snodeChain(al_path)
+            if depth + 1 == self._pageDepth and astr_verb == 'mknode':
+                for node in args[0]:
+                    self.page_register(l_chain[-1].d_nodes[node],
+                                       tuple(al_path + [node]))
+            else:
+                self.page_resize(l_chain[self._pageDepth])
+            self.enforce()
+
+        def pages_recount(self):
+            '''
+            Bring the pages in line with the tree after a mutation of
+            unknown effect: forget the pages that are gone, register the
+            new ones and recount the sizes of the resident ones.
+            '''
+            self.pages_prune()
+            self.pages_register(self.stree.snode_root, ('/',))
+            for l_page in self.d_resident.values():
+                self.page_resize(l_page[0])
+            self.enforce()
+
+        def pages_prune(self):
+            '''
+            Forget the pages that are no longer in the tree.
+            '''
+            l_level     = [self.stree.snode_root]
+            for depth in range(self._pageDepth):
+                l_level = [child for snode in l_level
+                                    for child in snode.d_nodes.values()]
+            s_live      = set([id(snode) for snode in l_level])
+            for page_id in self.d_resident.keys():
+                if page_id in s_live: continue
+                l_page  = self.d_resident.pop(page_id)
+                self._resident         -= l_page[1]
+            for str_key in self.d_spilled.keys():
+                snode, t_path   = self.d_spilled[str_key]
+                if id(snode) in s_live: continue
+                del self.d_spilled[str_key]
+                del self.d_spilledPath[t_path]
+                del self.shelf[str_key]
+
+        def snode_pinned(self):
+            '''
+            Return the page root on the path to the cwd, or None.
+            '''
+            l_cwd       = self.stree.l_cwd
+            if len(l_cwd) <= self._pageDepth: return None
+            snode       = self.stree.snode_root
+            for node in l_cwd[1:self._pageDepth + 1]:
+                snode   = snode.d_nodes[node]
+            return snode
+
+        def b_spillable(self, at_path):
+            '''
+            Check that the page at <at_path> is held in one place only:
+            neither its root nor any of its ancestors is shared.
+            '''
+            snode       = self.stree.snode_root
+            for node in at_path[1:]:
+                snode   = snode.d_nodes.get(node)
+                if snode is None or snode._refs > 1: return False
+            return True
+
+        def enforce(self, asnode_keep = None):
+            '''
+            Page out least recently used pages until the resident nodes
+            fit the budget. <asnode_keep> is not paged out.
+            '''
+            if self._resident <= self._budget: return
+            # Nodes touched by an open batch must stay put for its undo log
+            if self.stree.batch_current is not None: return
+            snode_pinned    = self.snode_pinned()
+            s_spilled       = set()
+            for page_id in self.d_resident.keys():
+                if self._resident <= self._budget: break
+                snode, size, t_path = self.d_resident[page_id]
+                if snode is snode_pinned or snode is asnode_keep: continue
+                if not self.b_spillable(t_path): continue
+                self.page_out(snode)
+                s_spilled.add(t_path)
+            if len(s_spilled): self.paths_drop(s_spilled)
+
+        def paths_drop(self, as_pages):
+            '''
+            Take the paths below the pages at the path tuples <as_pages>
+            out of the path index of the tree.
+            '''
+            depth       = self._pageDepth + 1
+            stree       = self.stree
+            stree.l_allPaths    = [l_path for l_path in stree.l_allPaths
+                                    if len(l_path) <= depth or
+                                       tuple(l_path[:depth]) not in as_pages]
+            stree.s_allPaths    = set([t_path for t_path in stree.s_allPaths
+                                        if len(t_path) <= depth or
+                                           t_path[:depth] not in as_pages])
+
+        def page_out(self, asnode):
+            '''
+            Spill the subtree below the page root <asnode> to the store.
+            The caller takes its paths out of the index, see paths_drop().
+            '''
+            snode, size, t_path         = self.d_resident.pop(id(asnode))
+            self._pageKey              += 1
+            str_key                     = str(self._pageKey)
+            self.shelf[str_key]         = [asnode.d_nodes[node].d_dump()
+                                            for node in asnode.d_nodes.keys()]
+            self.d_spilled[str_key]     = [asnode, t_path]
+            self.d_spilledPath[t_path]  = str_key
+            asnode.d_nodes              = C_pagedNodes(self, asnode, str_key)
+            self._resident             -= size
+            self._evictions            += 1
+
+        def page_in(self, asnode):
+            '''
+            Load the subtree below the page root <asnode> back in, along
+            with its paths.
+            '''
+            str_key                     = asnode.d_nodes.str_key
+            l_snode                     = self.shelf[str_key]
+            t_path                      = self.d_spilled[str_key][1]
+            del self.shelf[str_key]
+            del self.d_spilled[str_key]
+            del self.d_spilledPath[t_path]
+            asnode.d_nodes              = self.stree.d_nodesNew()
+            self.stree.nodes_load(l_snode, asnode, list(t_path))
+            self._misses               += 1
+            self.page_register(asnode, t_path)
+            self.enforce(asnode)
+
+        def d_stats(self):
+            '''
+            Return a dictionary of paging statistics.
+            '''
+            return {'budget':           self._budget,
+                    'resident':         self._resident,
+                    'pagesResident':    len(self.d_resident),
+                    'pagesOut':         len(self.d_spilled),
+                    'hits':             self._hits,
+                    'misses':           self._misses,
+                    'evictions':        self._evictions}
+
+        def detach(self):
+            '''
+            Page everything back in and stop paging the tree.
+            '''
+            self._budget                = sys.maxint
+            for snode, t_path in self.d_spilled.values():
+                snode.d_nodes.d_nodes()
+            self.stree.mutationHook_remove(self.mutation)
+            self.stree.pager            = None
+            self.shelf.close()
+            # The dbm behind the shelf adds its own suffixes to the name
+            for str_suffix in lstr_storeSuffix:
+                str_file    = self.str_store + str_suffix
+                if os.path.exists(str_file): os.remove(str_file)
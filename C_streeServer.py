@@ -0,0 +1,475 @@
+#!/usr/bin/env python
+"""
+    NAME
+
+        C_streeServer, C_streeClient
+
+    DESCRIPTION
+
+        'C_streeServer' hosts a single C_stree over a Unix domain socket,
+        so that several processes on a host can share one resident tree
+        instead of each building their own copy.
+
+        'C_streeClient' talks to the server. It keeps a pool of
+        connections, and besides single requests supports pipelined
+        requests (many requests in flight on one connection) and
+        batched requests (many requests in one message, executed under a
+        single acquisition of the tree lock).
+
+    NOTES
+
+        Protocol: each message is a 4 byte big-endian length followed by
+        a JSON payload. A request is
+
+            [<verb>, <cwd>, [<args>], {<kwargs>}]
+
+        or, for a batch, ['batch', <cwd>, [<request>, ...], {}]. The
+        response is [0, <result>] on success and [1, <error>] on failure;
+        for a batch, <result> is the list of the responses of its
+        requests.
+
+        The cwd travels with each request, so connections are stateless
+        and can be pooled freely; the client tracks its own cwd.
+
+        The server uses one thread per connection; requests are
+        serialized on the lock of the hosted tree.
+
+    HISTORY
+
+        19 October 2026
+        o Initial design and coding.
+
+"""
+
+# System modules
+import  os
+import  socket
+import  struct
+import  json
+import  threading
+import  Queue
+import  SocketServer
+
+from    C_snode         import  *
+
+# Length prefix of each message
+str_messageHeader       = '>I'
+messageHeaderLength     = struct.calcsize(str_messageHeader)
+
+def message_send(asocket, aobj):
+    '''
+    Send the JSON encoding of <aobj> as one message. Objects that JSON
+    cannot represent are sent as their repr().
+    '''
+    str_payload = json.dumps(aobj, separators = (',', ':'), default = repr)
+    asocket.sendall(struct.pack(str_messageHeader, len(str_payload)) +
+                    str_payload)
+
+def str_recvExactly(asocket, a_length):
+    l_chunks    = []
+    while a_length:
+        str_chunk   = asocket.recv(min(a_length, 1 << 16))
+        if not len(str_chunk): return None
+        l_chunks.append(str_chunk)
+        a_length   -= len(str_chunk)
+    return ''.join(l_chunks)
+
+def message_recv(asocket):
+    '''
+    Receive one message and return its decoded payload, or None if the
+    peer closed the connection. A payload that is not JSON, or is JSON
+    null (which would read as a closed connection), raises ValueError.
+    '''
+    str_header  = str_recvExactly(asocket, messageHeaderLength)
+    if str_header is None: return None
+    length,     = struct.unpack(str_messageHeader, str_header)
+    str_payload = str_recvExactly(asocket, length)
+    if str_payload is None: return None
+    payload     = json.loads(str_payload)
+    if payload is None: raise ValueError('null message')
+    return payload
+
+class C_streeRequestHandler(SocketServer.BaseRequestHandler):
+        '''
+        Serves the requests of one client connection, in order.
+        '''
+
+        def handle(self):
+            while True:
+                try:
+                    l_request   = message_recv(self.request)
+                except ValueError, e:
+                    message_send(self.request,
+                                 [1, 'malformed request: %s' % e])
+                    continue
+                if l_request is None: break
+                message_send(self.request,
+                             self.server.stree_server.response(l_request))
+
+class C_streeSocketServer(SocketServer.ThreadingMixIn,
+                          SocketServer.UnixStreamServer):
+        daemon_threads      = True
+
+class C_streeServer:
+        """
+        Hosts one C_stree over a Unix domain socket.
+        """
+
+        # The verbs that only navigate / query the tree, and those that
+        # mutate it (only served if the server is not read-only).
+        l_queryVerb     = ['cdnode', 'pwd', 'ls', 'lsnode', 'cat', 'lstree',
+                           'lsmeta', 'ptree', 'isAncestor', 'lca', 'subtree']
+        l_mutateVerb    = ['mknode', 'touch']
+
+        def __init__(self, astree, astr_socket, **kwargs):
+            '''
+            Serve <astree> on the Unix domain socket <astr_socket>.
+
+            Optional kwargs:
+
+                readOnly = True | False     refuse mutating verbs
+                                            (default True)
+            '''
+            self.str_obj                = 'C_streeServer'
+            self.stree                  = astree
+            self.str_socket             = astr_socket
+            self.b_readOnly             = True
+            for key, val in kwargs.iteritems():
+                if key == 'readOnly':   self.b_readOnly = val
+            self.server                 = None
+            self.thread                 = None
+
+        def start(self):
+            '''
+            Start serving in a background thread.
+            '''
+            if os.path.exists(self.str_socket): os.remove(self.str_socket)
+            self.server                 = C_streeSocketServer(
+                                            self.str_socket,
+                                            C_streeRequestHandler)
+            self.server.stree_server    = self
+            self.thread                 = threading.Thread(
+                                            target = self.server.serve_forever)
+            self.thread.daemon          = True
+            self.thread.start()
+
+        def serve_forever(self):
+            '''
+            Serve in the calling thread.
+            '''
+            self.start()
+            self.thread.join()
+
+        def stop(self):
+            if self.server is None: return
+            self.server.shutdown()
+            self.server.server_close()
+            self.server                 = None
+            if os.path.exists(self.str_socket): os.remove(self.str_socket)
+
+        def response(self, al_request):
+            '''
+            Execute the (decoded) request <al_request>, holding the tree
+            lock, and return its response. The cwd of the hosted tree is
+            restored afterwards. A malformed request gets an error
+            response.
+            '''
+            str_error   = C_streeServer.str_requestError(al_request)
+            if str_error is None and al_request[0] == 'batch':
+                for l_sub in al_request[2]:
+                    str_error   = C_streeServer.str_requestError(l_sub)
+                    if str_error is not None: break
+            if str_error is not None: return [1, str_error]
+            str_verb, str_cwd, l_args, d_kwargs = al_request
+            self.stree.lock.acquire()
+            str_treeCwd = self.stree.cwd()
+            try:
+                if str_verb != 'batch':
+                    return self.request_execute(str_verb, str_cwd,
+                                                l_args, d_kwargs)
+                l_response  = []
+                for l_sub in l_args:
+                    str_subVerb, str_subCwd, l_subArgs, d_subKwargs = l_sub
+                    l_response.append(self.request_execute(
+                                        str_subVerb, str_subCwd,
+                                        l_subArgs, d_subKwargs))
+                return [0, l_response]
+            finally:
+                self.stree.cdnode(str_treeCwd)
+                self.stree.lock.release()
+
+        @staticmethod
+        def str_requestError(al_request):
+            '''
+            Return what is wrong with the shape of the decoded request
+            <al_request>, or None if it is well formed.
+            '''
+            if not isinstance(al_request, list) or len(al_request) != 4:
+                return 'malformed request: expected [verb, cwd, [args], {kwargs}]'
+            str_verb, str_cwd, l_args, d_kwargs = al_request
+            if not isinstance(str_verb, basestring):
+                return 'malformed request: the verb is not a string'
+            if not isinstance(str_cwd, basestring):
+                return 'malformed request: the cwd is not a string'
+            if not isinstance(l_args, list):
+                return 'malformed request: the args are not a list'
+            if not isinstance(d_kwargs, dict):
+                return 'malformed request: the kwargs are not a dictionary'
+            return None
+
+        def request_execute(self, astr_verb, astr_cwd, al_args, ad_kwargs):
+            if astr_verb not in C_streeServer.l_queryVerb and \
+              (self.b_readOnly or astr_verb not in C_streeServer.l_mutateVerb):
+                return [1, 'unknown or refused verb "%s"' % astr_verb]
+            l_cwd       = self.stree.l_pathAbs(astr_cwd)
+            if self.stree.l_snodeChain(l_cwd, ab_split = False) is None:
+                return [1, 'no such node "%s"' % astr_cwd]
+            self.stree.cdnode(astr_cwd)
+            try:
+                result  = getattr(self, 'verb_%s' % astr_verb)(*al_args,
+                                                               **ad_kwargs)
+            except Exception, e:
+                return [1, '%s: %s' % (e.__class__.__name__, e)]
+            return [0, result]
+
+        #
+        # Verbs. Each runs with the tree cwd set to the cwd of the request.
+
+        def snode(self, astr_path):
+            if not len(astr_path): return self.stree.snode_current
+            snode       = self.stree.snode_find(astr_path)
+            if snode is None: raise KeyError(astr_path)
+            return snode
+
+        def verb_cdnode(self, astr_path):
+            l_path      = self.stree.l_pathAbs(astr_path)
+            if self.stree.l_snodeChain(l_path, ab_split = False) is None:
+                raise KeyError(astr_path)
+            return '/' + '/'.join(l_path[1:])
+
+        def verb_pwd(self):
+            return self.stree.cwd()
+
+        def verb_lsnode(self, astr_path = "", **kwargs):
+            return self.stree.lstr_nodePage(self.snode(astr_path), **kwargs)
+
+        def verb_ls(self, astr_path = "", **kwargs):
+            snode       = self.snode(astr_path)
+            return [self.stree.lstr_nodePage(snode, **kwargs), snode.d_data]
+
+        def verb_cat(self, astr_name):
+            return self.stree.cat(astr_name)
+
+        def b_metaDataPrint(self, astr_path):
+            return self.stree.b_metaDataPrint(self.stree.l_pathAbs(astr_path))
+
+        def verb_lstree(self, astr_path = ""):
+            return self.snode(astr_path).str_render(self.stree.cache_render,
+                                            self.b_metaDataPrint(astr_path))
+
+        def verb_lsmeta(self, astr_path = ""):
+            snode       = self.snode(astr_path)
+            b_contents  = snode.b_printContents
+            snode.b_printContents       = False
+            try:        return snode.str_render(self.stree.cache_render,
+                                            self.b_metaDataPrint(astr_path))
+            finally:    snode.b_printContents   = b_contents
+
+        def verb_ptree(self):
+            return self.stree.ptree()
+
+        def verb_isAncestor(self, astr_ancestor, astr_path):
+            return self.stree.b_isAncestor(astr_ancestor, astr_path)
+
+        def verb_lca(self, astr_path1, astr_path2):
+            return self.stree.str_lca(astr_path1, astr_path2)
+
+        def verb_subtree(self, astr_path):
+            return self.stree.lstr_subtree(astr_path)
+
+        def verb_mknode(self, al_branchNodes):
+            return self.stree.mknode([str(node) for node in al_branchNodes])
+
+        def verb_touch(self, astr_name, adata):
+            return self.stree.touch(str(astr_name), adata)
+
+class C_streeClient:
+        """
+        A client of a C_streeServer, with a pool of connections.
+
+        The client tracks its own cwd; cdnode() validates the new cwd on
+        the server. The query verbs mirror those of C_stree and return the
+        result, raising C_streeClientError if the server reports an error.
+        """
+
+        def __init__(self, astr_socket, **kwargs):
+            '''
+            Connect to the server at the Unix domain socket <astr_socket>.
+
+            Optional kwargs:
+
+                poolSize = <n>      maximum number of pooled connections
+                                    (default 4)
+                window   = <n>      maximum number of requests in flight
+                                    on one connection when pipelining
+                                    (default 64)
+            '''
+            self.str_obj                = 'C_streeClient'
+            self.str_socket             = astr_socket
+            self._poolSize              = 4
+            self._window                = 64
+            for key, val in kwargs.iteritems():
+                if key == 'poolSize':   self._poolSize  = val
+                if key == 'window':     self._window    = val
+            self.str_cwd                = '/'
+            self.queue_pool             = Queue.Queue()
+            self._connections           = 0
+            self.lock_pool              = threading.Lock()
+            self.cond_pool              = threading.Condition(self.lock_pool)
+                                                # signals a connection put
+                                                #+ back or discarded
+
+        #
+        # Connection pool
+
+        def socket_get(self):
+            '''
+            Take a connection from the pool, opening a new one while the
+            pool is below its maximum size, or else waiting until one is
+            put back, or discarded (which makes room for a new one).
+            '''
+            self.cond_pool.acquire()
+            try:
+                while True:
+                    try:
+                        return self.queue_pool.get_nowait()
+                    except Queue.Empty:
+                        pass
+                    if self._connections < self._poolSize: break
+                    self.cond_pool.wait()
+                self._connections      += 1
+            finally:
+                self.cond_pool.release()
+            sock        = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            try:
+                sock.connect(self.str_socket)
+            except:
+                self.socket_discard(sock)
+                raise
+            return sock
+
+        def socket_put(self, asocket):
+            self.cond_pool.acquire()
+            try:
+                self.queue_pool.put(asocket)
+                self.cond_pool.notify()
+            finally:
+                self.cond_pool.release()
+
+        def socket_discard(self, asocket):
+            asocket.close()
+            self.cond_pool.acquire()
+            try:
+                self._connections  -= 1
+                self.cond_pool.notify()
+            finally:
+                self.cond_pool.release()
+
+        def close(self):
+            '''
+            Close all idle pooled connections.
+            '''
+            while True:
+                try:                sock = self.queue_pool.get_nowait()
+                except Queue.Empty: break
+                self.socket_discard(sock)
+
+        #
+        # Requests
+
+        def l_request(self, astr_verb, *args, **kwargs):
+            '''
+            Return the wire form of a request, for pipeline()/batch().
+            '''
+            return [astr_verb, self.str_cwd, list(args), kwargs]
+
+        def request(self, astr_verb, *args, **kwargs):
+            return self.pipeline([self.l_request(astr_verb, *args, **kwargs)])[0]
+
+        def pipeline(self, al_requests):
+            '''
+            Send the requests <al_requests> (see l_request()) down one
+            connection without waiting for each response, keeping up to
+            'window' requests in flight, and return their results in
+            order.
+            '''
+            sock        = self.socket_get()
+            l_response  = []
+            try:
+                sent    = 0
+                while len(l_response) < len(al_requests):
+                    while sent < len(al_requests) and \
+                          sent - len(l_response) < self._window:
+                        message_send(sock, al_requests[sent])
+                        sent   += 1
+                    l_msg   = message_recv(sock)
+                    if l_msg is None:
+                        raise C_streeClientError('connection closed')
+                    l_response.append(l_msg)
+            except:
+                self.socket_discard(sock)
+                raise
+            self.socket_put(sock)
+            return [C_streeClient.result(l_msg) for l_msg in l_response]
+
+        def batch(self, al_requests):
+            '''
+            Send the requests <al_requests> (see l_request()) as a single
+            message, executed by the server in one go, and return their
+            results in order.
+            '''
+            l_response  = self.request('batch', *al_requests)
+            return [C_streeClient.result(l_sub) for l_sub in l_response]
+
+        @staticmethod
+        def result(al_response):
+            b_error, result = al_response
+            if b_error: raise C_streeClientError(result)
+            return result
+
+        #
+        # Verbs
+
+        def cdnode(self, astr_path):
+            self.str_cwd                = self.request('cdnode', astr_path)
+            return self.str_cwd
+
+        def cwd(self):                      return self.str_cwd
+        def pwd(self):                      return self.str_cwd
+        def cat(self, astr_name):           return self.request('cat', astr_name)
+        def lstree(self, astr_path = ""):   return self.request('lstree', astr_path)
+        def lsmeta(self, astr_path = ""):   return self.request('lsmeta', astr_path)
+        def ptree(self):                    return self.request('ptree')
+        def mknode(self, al_branchNodes):   return self.request('mknode', al_branchNodes)
+        def touch(self, name, data):        return self.request('touch', name, data)
+
+        def lstr_lsnode(self, astr_path = "", **kwargs):
+            return self.request('lsnode', astr_path, **kwargs)
+
+        def ls(self, astr_path = "", **kwargs):
+            return self.request('ls', astr_path, **kwargs)
+
+        def b_isAncestor(self, astr_ancestor, astr_path):
+            return self.request('isAncestor', astr_ancestor, astr_path)
+
+        def str_lca(self, astr_path1, astr_path2):
+            return self.request('lca', astr_path1, astr_path2)
+
+        def lstr_subtree(self, astr_path):
+            return self.request('subtree', astr_path)
+
+class C_streeClientError(Exception):
+        '''
+        An error reported by a C_streeServer.
+        '''
+        pass
@@ -0,0 +1,311 @@
+#!/usr/bin/env python
+"""
+    NAME
+
+        C_streeStats
+
+    DESCRIPTION
+
+        'C_streeStats' answers statistical questions about a C_stree --
+        how many nodes at each depth, the average fan-out, the spread of
+        a d_data field, the fraction of nodes that match a predicate --
+        approximately, by sampling, in time proportional to the number
+        of samples rather than to the size of the tree.
+
+        Each sample is a random descent from the root that picks one
+        child uniformly at each node (Knuth's estimator). A node met at
+        depth d on a descent stands in for the product of the fan-outs
+        above it, so the weighted sum of a quantity over one descent is
+        an unbiased estimate of its sum over the whole tree. The mean
+        over many descents is returned with a normal confidence interval
+        from their spread. Ratios (fractions, averages) are estimated as
+        ratios of such sums, with a delta-method interval.
+
+        Trees with no more than 'exactBelow' nodes are walked in full
+        instead, and the answers are exact.
+
+    NOTES
+
+        Estimates are dictionaries
+
+            {'estimate': <x>, 'low': <x>, 'high': <x>, 'exact': <bool>}
+
+        d_mean() adds 'skipped', the (estimated) number of nodes whose
+        field is not a real number and was left out of the mean.
+
+        A child is picked in O(1) from a C_orderedNodes container (see
+        the 'childOrder' of C_stree), otherwise by reservoir sampling
+        over the children, which needs no list of them. The folded nodes
+        of a compressed tree are counted as the nodes they stand for.
+
+    HISTORY
+
+        19 October 2026
+        o Initial design and coding.
+
+"""
+
+# System modules
+import  math
+import  numbers
+import  itertools
+import  random
+
+from    C_snode         import  *
+
+class C_streeStats:
+        """
+        Sampled (or, for small trees, exact) statistics over a C_stree.
+        """
+
+        def __init__(self, astree, **kwargs):
+            '''
+            Estimate statistics of <astree>.
+
+            Optional kwargs:
+
+                samples     = <n>   random descents per estimate
+                                    (default 1000)
+                exactBelow  = <n>   walk trees of at most <n> nodes in
+                                    full (default 10000)
+                z           = <x>   normal quantile of the confidence
+                                    interval (default 1.96, i.e. 95%)
+                seed        = <x>   seed of the random generator
+            '''
+            self.str_obj                = 'C_streeStats'
+            self.stree                  = astree
+            self._samples               = 1000
+            self._exactBelow            = 10000
+            self._z                     = 1.96
+            seed                        = None
+            for key, val in kwargs.iteritems():
+                if key == 'samples':    self._samples       = val
+                if key == 'exactBelow': self._exactBelow    = val
+                if key == 'z':          self._z             = val
+                if key == 'seed':       seed                = val
+            self.random                 = random.Random(seed)
+
+        def b_exact(self):
+            '''
+            Return whether the tree is small enough to walk in full. The
+            tree is sized from the subtree size of its root, which counts
+            the nodes of spilled pages (see C_streePager) and folded
+            nodes as well, unlike the path index.
+            '''
+            self.stree.label_update()
+            return self.stree.snode_root._size <= self._exactBelow
+
+        #
+        # Walks
+
+        def child_pick(self, ad_nodes):
+            '''
+            Return a child of <ad_nodes> chosen uniformly at random.
+            '''
+            if isinstance(ad_nodes, C_orderedNodes):
+                return ad_nodes[ad_nodes.l_keys[
+                                    self.random.randrange(len(ad_nodes))]]
+            picked      = None
+            seen        = 0
+            for snode in ad_nodes.itervalues():
+                seen   += 1
+                if self.random.randrange(seen) == 0: picked = snode
+            return picked
+
+        def l_descent(self):
+            '''
+            Return one random descent from the root, as a list of
+            (snode, depth, weight) with the Knuth weight of each node.
+            '''
+            l_walk      = []
+            snode       = self.stree.snode_root
+            depth       = 0
+            weight      = 1
+            while True:
+                l_walk.append((snode, depth, weight))
+                fanout  = len(snode.d_nodes)
+                if not fanout: return l_walk
+                weight *= fanout
+                depth  += 1
+                snode   = self.child_pick(snode.d_nodes)
+                for edge in range(len(snode.l_edge)):
+                    l_walk.append((snode.snode_edge(edge), depth, weight))
+                    depth  += 1
+
+        def l_all(self):
+            '''
+            Return every node of the tree as (snode, depth, 1).
+            '''
+            l_walk      = []
+            l_stack     = [(self.stree.snode_root, 0)]
+            while len(l_stack):
+                snode, depth = l_stack.pop()
+                l_walk.append((snode, depth, 1))
+                for child in snode.d_nodes.values():
+                    for edge in range(len(child.l_edge)):
+                        l_walk.append((child.snode_edge(edge), depth + 1 + edge, 1))
+                    l_stack.append((child, depth + 1 + len(child.l_edge)))
+            return l_walk
+
+        def l_totals(self, afunc_contrib):
+            '''
+            Return the per-sample totals of the contributions of the nodes,
+            and whether they are exact. <afunc_contrib>(snode, depth)
+            returns a dictionary of named contributions of a node; each
+            sample is the dictionary of the weighted sums of these over
+            one descent (or, if the tree is walked in full, over all
+            nodes, as the only sample).
+            '''
+            self.stree.lock.acquire()
+            try:
+                b_exact     = self.b_exact()
+                if b_exact:         l_walks = [self.l_all()]
+                else:               l_walks = [self.l_descent()
+                                               for i in range(self._samples)]
+                l_totals    = []
+                for l_walk in l_walks:
+                    d_total = {}
+                    for snode, depth, weight in l_walk:
+                        for key, value in afunc_contrib(snode, depth).iteritems():
+                            d_total[key] = d_total.get(key, 0) + weight * value
+                    l_totals.append(d_total)
+            finally:
+                self.stree.lock.release()
+            return l_totals, b_exact
+
+        #
+        # Estimates
+
+        def d_estimate(self, al_values, ab_exact,
+                       a_floor = None, a_ceiling = None):
+            '''
+            Return the estimate (mean) of the per-sample values <al_values>
+            with its confidence interval, clipped to the given bounds.
+            '''
+            n           = len(al_values)
+            f_mean      = float(sum(al_values)) / n
+            f_half      = 0.0
+            if n > 1:
+                f_var   = sum([(x - f_mean) ** 2 for x in al_values]) / (n - 1)
+                f_half  = self._z * math.sqrt(f_var / n)
+            return self.d_interval(f_mean, f_half, ab_exact,
+                                   a_floor, a_ceiling)
+
+        def d_ratio(self, al_num, al_den, ab_exact,
+                    a_floor = None, a_ceiling = None):
+            '''
+            Return the estimate of sum(<al_num>) / sum(<al_den>) with a
+            (delta method) confidence interval.
+            '''
+            n           = len(al_num)
+            f_num       = float(sum(al_num)) / n
+            f_den       = float(sum(al_den)) / n
+            if not f_den: return self.d_interval(0.0, 0.0, ab_exact)
+            f_ratio     = f_num / f_den
+            f_half      = 0.0
+            if n > 1:
+                f_var   = sum([(al_num[i] - f_ratio * al_den[i]) ** 2
+                               for i in range(n)]) / (n - 1)
+                f_half  = self._z * math.sqrt(f_var / n) / f_den
+            return self.d_interval(f_ratio, f_half, ab_exact,
+                                   a_floor, a_ceiling)
+
+        @staticmethod
+        def d_interval(af_estimate, af_half, ab_exact,
+                       a_floor = None, a_ceiling = None):
+            f_low       = af_estimate - af_half
+            f_high      = af_estimate + af_half
+            if a_floor is not None:     f_low   = max(f_low, a_floor)
+            if a_ceiling is not None:   f_high  = min(f_high, a_ceiling)
+            return {'estimate': af_estimate,
+                    'low':      f_low,
+                    'high':     f_high,
+                    'exact':    ab_exact}
+
+        def d_count(self):
+            '''
+            Estimate the number of nodes in the tree.
+            '''
+            l_totals, b_exact = self.l_totals(lambda snode, depth: {'n': 1})
+            return self.d_estimate([d['n'] for d in l_totals], b_exact, 1)
+
+        def d_depthCounts(self):
+            '''
+            Estimate the number of nodes at each depth. Returns a
+            dictionary of depth -> estimate.
+            '''
+            l_totals, b_exact = self.l_totals(lambda snode, depth: {depth: 1})
+            d_depth     = {}
+            for depth in set(itertools.chain(*l_totals)):
+                d_depth[depth] = self.d_estimate([d.get(depth, 0)
+                                                  for d in l_totals],
+                                               b_exact, 0)
+            return d_depth
+
+        def d_fanout(self):
+            '''
+            Estimate the average number of children of the nodes that
+            have any.
+            '''
+            def contrib(snode, depth):
+                fanout  = len(snode.d_nodes)
+                if not fanout: return {}
+                return {'children': fanout, 'parents': 1}
+            l_totals, b_exact = self.l_totals(contrib)
+            return self.d_ratio([d.get('children', 0) for d in l_totals],
+                                [d.get('parents', 0) for d in l_totals],
+                                b_exact, 1)
+
+        def d_fraction(self, afunc_predicate):
+            '''
+            Estimate the fraction of nodes for which
+            <afunc_predicate>(snode) is true.
+            '''
+            def contrib(snode, depth):
+                if afunc_predicate(snode): return {'match': 1, 'n': 1}
+                return {'n': 1}
+            l_totals, b_exact = self.l_totals(contrib)
+            return self.d_ratio([d.get('match', 0) for d in l_totals],
+                                [d['n'] for d in l_totals], b_exact, 0, 1)
+
+        def d_distribution(self, astr_key):
+            '''
+            Estimate how many nodes hold each value of the d_data field
+            <astr_key>. Returns a dictionary of value -> estimate; values
+            that are not hashable are counted by their repr().
+            '''
+            def contrib(snode, depth):
+                if astr_key not in snode.d_data: return {}
+                value   = snode.d_data[astr_key]
+                try:                hash(value)
+                except TypeError:   value   = repr(value)
+                return {value: 1}
+            l_totals, b_exact = self.l_totals(contrib)
+            d_values    = {}
+            for value in set(itertools.chain(*l_totals)):
+                d_values[value] = self.d_estimate([d.get(value, 0)
+                                                   for d in l_totals],
+                                                b_exact, 0)
+            return d_values
+
+        def d_mean(self, astr_key):
+            '''
+            Estimate the mean of the numeric d_data field <astr_key> over
+            the nodes that have it. Values that are not real numbers
+            (strings, None, booleans, ...) are left out of the mean; the
+            estimated number of nodes left out is returned as 'skipped'
+            (exact if the tree was walked in full).
+            '''
+            def contrib(snode, depth):
+                if astr_key not in snode.d_data: return {}
+                value   = snode.d_data[astr_key]
+                if not isinstance(value, numbers.Real) or isinstance(value, bool):
+                    return {'skipped': 1}
+                return {'sum': value, 'n': 1}
+            l_totals, b_exact = self.l_totals(contrib)
+            d_mean      = self.d_ratio([d.get('sum', 0) for d in l_totals],
+                                       [d.get('n', 0) for d in l_totals],
+                                       b_exact)
+            d_mean['skipped'] = float(sum([d.get('skipped', 0)
+                                           for d in l_totals])) / len(l_totals)
+            return d_mean
@@ -0,0 +1,250 @@
+#!/usr/bin/env python
+"""
+    NAME
+
+        C_indexedHeap, C_streeTopK
+
+    DESCRIPTION
+
+        'C_streeTopK' keeps the K heaviest subtrees of a C_stree ready to
+        be read at any time. The weight of a node is its meta hitCount
+        or a numeric d_data field; the weight of a subtree is the sum of
+        the weights of its nodes. Subtrees are ranked either at a chosen
+        depth (e.g. depth 1: the heaviest top level subtrees) or across
+        the whole tree.
+
+        The subtree weights are held in a 'C_indexedHeap', a binary
+        max-heap with an index from each subtree to its position, so a
+        weight can be changed in place in O(log n). The tracker is a
+        mutation hook of the tree: a change in the weight of a node is
+        added to the subtrees containing it -- one of them when ranking
+        at a depth, each subtree up the path when ranking tree-wide --
+        in O(log n) each. Reading the top K takes O(K log K).
+
+    NOTES
+
+        Weights that are not numbers count as 0. Subtrees of weight 0
+        are not ranked.
+
+    HISTORY
+
+        19 October 2026
+        o Initial design and coding.
+
+"""
+
+# System modules
+import  heapq
+import  numbers
+
+from    C_snode         import  *
+
+class C_indexedHeap:
+        """
+        A max-heap of (key, value) entries with in-place value updates.
+        """
+
+        def __init__(self):
+            self.str_obj                = 'C_indexedHeap'
+            self.l_heap                 = []    # [value, key], heap ordered
+            self.d_pos                  = {}    # key -> index in l_heap
+
+        def __len__(self):
+            return len(self.l_heap)
+
+        def __contains__(self, key):
+            return key in self.d_pos
+
+        def value(self, key, adefault = 0):
+            if key not in self.d_pos: return adefault
+            return self.l_heap[self.d_pos[key]][0]
+
+        def swap(self, i, j):
+            l_heap      = self.l_heap
+            l_heap[i], l_heap[j] = l_heap[j], l_heap[i]
+            self.d_pos[l_heap[i][1]]    = i
+            self.d_pos[l_heap[j][1]]    = j
+
+        def sift_up(self, i):
+            while i:
+                parent  = (i - 1) // 2
+                if self.l_heap[parent][0] >= self.l_heap[i][0]: break
+                self.swap(i, parent)
+                i       = parent
+
+        def sift_down(self, i):
+            n           = len(self.l_heap)
+            while True:
+                largest = i
+                for child in (2 * i + 1, 2 * i + 2):
+                    if child < n and \
+                       self.l_heap[child][0] > self.l_heap[largest][0]:
+                        largest = child
+                if largest == i: break
+                self.swap(i, largest)
+                i       = largest
+
+        def update(self, key, avalue):
+            '''
+            Set the value of <key>, inserting it if needed.
+            '''
+            if key not in self.d_pos:
+                self.l_heap.append([avalue, key])
+                self.d_pos[key]         = len(self.l_heap) - 1
+                self.sift_up(len(self.l_heap) - 1)
+                return
+            i           = self.d_pos[key]
+            old         = self.l_heap[i][0]
+            self.l_heap[i][0]           = avalue
+            if avalue > old:    self.sift_up(i)
+            else:               self.sift_down(i)
+
+        def remove(self, key):
+            '''
+            Remove <key>, if present.
+            '''
+            if key not in self.d_pos: return
+            i           = self.d_pos[key]
+            last        = len(self.l_heap) - 1
+            if i != last: self.swap(i, last)
+            self.l_heap.pop()
+            del self.d_pos[key]
+            if i < len(self.l_heap):
+                self.sift_up(i)
+                self.sift_down(i)
+
+        def l_top(self, a_k):
+            '''
+            Return the <a_k> entries with the largest values, largest
+            first, as (key, value) tuples.
+            '''
+            l_top       = []
+            l_frontier  = []
+            if len(self.l_heap):
+                l_frontier  = [(-self.l_heap[0][0], 0)]
+            while len(l_frontier) and len(l_top) < a_k:
+                value, i    = heapq.heappop(l_frontier)
+                l_top.append((self.l_heap[i][1], -value))
+                for child in (2 * i + 1, 2 * i + 2):
+                    if child < len(self.l_heap):
+                        heapq.heappush(l_frontier,
+                                       (-self.l_heap[child][0], child))
+            return l_top
+
+class C_streeTopK:
+        """
+        Tracks the heaviest subtrees of a C_stree as the tree changes.
+        """
+
+        def __init__(self, astree, **kwargs):
+            '''
+            Track the subtrees of <astree>.
+
+            Optional kwargs:
+
+                field = None | <key>    weigh nodes by their hitCount
+                                        (default) or by the numeric
+                                        d_data item <key>
+                depth = None | <n>      rank the subtrees at depth <n>,
+                                        or (default) all subtrees
+            '''
+            self.str_obj                = 'C_streeTopK'
+            self.stree                  = astree
+            self.str_field              = None
+            self._depth                 = None
+            for key, val in kwargs.iteritems():
+                if key == 'field':      self.str_field  = val
+                if key == 'depth':      self._depth     = val
+            self.heap                   = C_indexedHeap()
+            self.d_weight               = {}    # path tuple -> own weight,
+                                                #+ for weighted nodes only
+            self.tree_scan()
+            astree.mutationHook_add(self.mutation)
+
+        def detach(self):
+            '''
+            Stop tracking the tree.
+            '''
+            self.stree.mutationHook_remove(self.mutation)
+
+        @staticmethod
+        def weight_value(avalue):
+            if isinstance(avalue, numbers.Number) and \
+               not isinstance(avalue, bool):
+                return avalue
+            return 0
+
+        def weight(self, asnode):
+            '''
+            Return the own weight of <asnode>.
+            '''
+            if self.str_field is None: return asnode.meta._hitCount
+            return C_streeTopK.weight_value(asnode.d_data.get(self.str_field))
+
+        def tree_scan(self):
+            '''
+            Weigh every node of the tree, and rank the subtrees.
+            '''
+            self.stree.lock.acquire()
+            try:
+                l_stack = [(('/',), self.stree.snode_root)]
+                while len(l_stack):
+                    t_path, snode   = l_stack.pop()
+                    self.weight_set(t_path, self.weight(snode))
+                    for node in snode.d_nodes.keys():
+                        child   = snode.d_nodes[node]
+                        l_stack.append((t_path + tuple(child.l_edge) +
+                                        (child.str_nodeName,), child))
+            finally:
+                self.stree.lock.release()
+
+        def l_ranked(self, at_path):
+            '''
+            Return the subtrees whose weight includes the node at
+            <at_path>.
+            '''
+            if self._depth is None:
+                return [at_path[:depth] for depth in range(1, len(at_path) + 1)]
+            if len(at_path) <= self._depth: return []
+            return [at_path[:self._depth + 1]]
+
+        def weight_set(self, at_path, a_weight):
+            '''
+            Set the own weight of the node at <at_path>, and update the
+            subtrees containing it.
+            '''
+            delta       = a_weight - self.d_weight.get(at_path, 0)
+            if a_weight:    self.d_weight[at_path]  = a_weight
+            else:           self.d_weight.pop(at_path, None)
+            if not delta: return
+            for t_subtree in self.l_ranked(at_path):
+                total   = self.heap.value(t_subtree) + delta
+                if total:   self.heap.update(t_subtree, total)
+                else:       self.heap.remove(t_subtree)
+
+        def mutation(self, astr_verb, al_path, *args):
+            '''
+            The C_stree mutation hook.
+            '''
+            t_path      = tuple(al_path)
+            if astr_verb == 'touch' and self.str_field is not None:
+                if args[0] == self.str_field:
+                    self.weight_set(t_path, C_streeTopK.weight_value(args[1]))
+            elif astr_verb == 'node_hitCount' and self.str_field is None:
+                count, b_reset  = args
+                if not b_reset: count  += self.d_weight.get(t_path, 0)
+                self.weight_set(t_path, count)
+            elif astr_verb == 'rmnode':
+                t_removed   = t_path + (args[0],)
+                depth       = len(t_removed)
+                for t_node in [t for t in self.d_weight.keys()
+                                    if t[:depth] == t_removed]:
+                    self.weight_set(t_node, 0)
+
+        def l_top(self, a_k):
+            '''
+            Return the <a_k> heaviest subtrees, heaviest first, as
+            (path, weight) tuples.
+            '''
+            return [('/' + '/'.join(t_path[1:]), weight)
+                    for t_path, weight in self.heap.l_top(a_k)]
@@ -0,0 +1,48 @@
+#!/usr/bin/env python
+"""
+    Regression tests for C_streeAsync.
+"""
+
+import  os
+import  sys
+import  threading
+import  unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from    C_snode         import  *
+from    C_streeAsync    import  *
+
+class test_async(unittest.TestCase):
+
+        def test_cwdUnderConcurrentMkpath(self):
+            stree       = C_stree()
+            async       = C_streeAsync(stree, chunk = 4)
+
+            def mkpaths():
+                for i in range(100):
+                    async.mkpath('/race/m%d/deep' % i)
+
+            thread      = threading.Thread(target = mkpaths)
+            thread.start()
+            async.ingest([[('/src%d/r%d' % (j, i), {'k': i}) for i in range(200)]
+                          for j in range(4)])
+            thread.join()
+            self.assertEqual(stree.cwd(), '/')
+            self.assertEqual(async.cat('/src3/r199', 'k'), 199)
+
+        def test_failedRecordStopsProducers(self):
+            stree       = C_stree()
+            async       = C_streeAsync(stree, queueSize = 2, chunk = 2)
+            l_before    = threading.enumerate()
+            l_sources   = [[('/a%d' % i, {'k': i}) for i in range(50)],
+                           [('/b%d' % i, {'k': i}) for i in range(50)],
+                           [('/bad', ['not', 'a', 'dict'])] +
+                           [('/c%d' % i, {'k': i}) for i in range(50)]]
+            self.assertRaises(AttributeError, async.ingest, l_sources)
+            l_left      = [thread for thread in threading.enumerate()
+                                    if thread not in l_before]
+            self.assertEqual(l_left, [])
+
+if __name__ == '__main__':
+    unittest.main()
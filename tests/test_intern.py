@@ -0,0 +1,106 @@
+#!/usr/bin/env python
+"""
+    Regression tests for the hash-consing of C_stree.
+"""
+
+import  os
+import  sys
+import  unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from    C_snode         import  *
+
+class test_intern(unittest.TestCase):
+
+        def test_payloadTypeKept(self):
+            stree       = C_stree()
+            stree.intern_enable()
+            stree.mknode(['a', 'b'])
+            for str_path in ['/a', '/b']:
+                stree.cdnode(str_path)
+                stree.touch('l', [1, 2])
+                stree.touch('s', 'shared')
+            l_value     = stree.cat('l')
+            self.assertEqual(type(l_value), list)
+            l_value.append(3)
+            stree.cdnode('/a')
+            self.assertEqual(stree.cat('l'), [1, 2])
+            self.assertTrue(stree.cat('s') is stree.cat_many(['/b'], 's')[0])
+
+        def test_payloadFrozenOnRequest(self):
+            stree       = C_stree()
+            stree.intern_enable(freeze = True)
+            stree.touch('l', [1, [2]])
+            self.assertEqual(stree.cat('l'), (1, (2,)))
+
+        def test_branchOfSharedNode(self):
+            stree       = C_stree()
+            stree.mknode_many(['/a/x/y', '/b/x/y'])
+            stree.touch_many([('/a', {'k': 'a'}), ('/b', {'k': 'b'})])
+            stree.subtrees_intern()
+            snode_a     = stree.snode_find('/a')
+            snode_b     = stree.snode_find('/b')
+            self.assertTrue(snode_a.d_nodes['x'] is snode_b.d_nodes['x'])
+            for str_parent, snode in [('/a', snode_a), ('/b', snode_b)]:
+                stree.cdnode(str_parent + '/x')
+                self.assertTrue(stree.sbranch_current.dict_branch is snode.d_nodes)
+
+        def test_statsCountPayloadsOnce(self):
+            stree       = C_stree()
+            stree.intern_enable()
+            l_paths     = ['/n%d' % i for i in range(12)]
+            stree.mknode_many(l_paths)
+            stree.touch_many([(str_path, {'v': i % 4})
+                              for i, str_path in enumerate(l_paths)])
+            for i in range(2):
+                stree.subtrees_intern()
+                d_stats = stree.d_internStats()
+                self.assertEqual(d_stats['payloads'], 12)
+                self.assertEqual(d_stats['distinctPayloads'], 4)
+                self.assertEqual(d_stats['payloadRatio'], 3.0)
+
+        def test_unusedPayloadsReleased(self):
+            stree       = C_stree()
+            stree.intern_enable()
+            stree.mknode_many(['/a/x', '/b/x'])
+            stree.touch_many([('/a/x', {'k': 'same'}), ('/b/x', {'k': 'same'}),
+                              ('/a', {'k': 'old'})])
+            stree.cdnode('/a')
+            stree.touch('k', 'new')
+            self.assertEqual(sorted([l_entry[0] for l_entry in
+                                     stree.pool_intern.d_pool.values()]),
+                             ['new', 'same'])
+            self.assertTrue(stree.subtrees_intern() > 0)
+            stree.cdnode('/')
+            try:
+                with stree.batch():
+                    stree.rmnode('a')
+                    stree.rmnode('b')
+                    self.assertEqual(stree.d_internStats()['distinctPayloads'], 0)
+                    raise ValueError('rollback')
+            except ValueError:
+                pass
+            d_stats     = stree.d_internStats()
+            self.assertEqual(d_stats['distinctPayloads'], 2)
+            self.assertEqual(d_stats['payloads'], 3)
+            stree.rmnode('a')
+            self.assertEqual(stree.d_internStats()['distinctPayloads'], 1)
+            stree.rmnode('b')
+            self.assertEqual(stree.d_internStats()['distinctPayloads'], 0)
+
+        def test_listPayloadsShared(self):
+            stree       = C_stree()
+            stree.intern_enable()
+            stree.mknode_many(['/a/item', '/b/item'])
+            stree.touch_many([('/a/item', {'desc': ['red', 'round']}),
+                              ('/b/item', {'desc': ['red', 'round']})])
+            self.assertEqual(stree.subtrees_intern(), 1)
+            stree.cdnode('/b/item')
+            self.assertEqual(type(stree.cat('desc')), list)
+            stree.touch('desc', ['green'])
+            stree.cdnode('/a/item')
+            self.assertEqual(stree.cat('desc'), ['red', 'round'])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,99 @@
+#!/usr/bin/env python
+"""
+    Regression tests for C_streeJournal.
+"""
+
+import  os
+import  sys
+import  time
+import  shutil
+import  tempfile
+import  unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from    C_snode         import  *
+from    C_streeJournal  import  *
+
+class test_journal(unittest.TestCase):
+
+        def setUp(self):
+            self.str_dir    = tempfile.mkdtemp()
+            self.str_base   = os.path.join(self.str_dir, 'tree')
+
+        def tearDown(self):
+            shutil.rmtree(self.str_dir)
+
+        def test_quietTreeReachesTail(self):
+            journal     = C_streeJournal(self.str_base, maxAge = 0.1)
+            stree       = C_stree()
+            journal.attach(stree)
+            tail        = C_streeJournalTail(self.str_base)
+            stree.mknode(['a'])
+            applied     = 0
+            f_deadline  = time.time() + 2
+            while time.time() < f_deadline and not applied:
+                time.sleep(0.05)
+                applied = tail.poll()
+            self.assertEqual(applied, 1)
+            self.assertTrue(tail.stree.b_pathOK(['/', 'a']))
+            journal.detach()
+
+        def test_countOnlyWaitsForBatch(self):
+            journal     = C_streeJournal(self.str_base, maxAge = 0)
+            stree       = C_stree()
+            journal.attach(stree)
+            tail        = C_streeJournalTail(self.str_base)
+            stree.mknode(['a'])
+            time.sleep(0.1)
+            self.assertEqual(tail.poll(), 0)
+            journal.checkpoint()
+            self.assertEqual(tail.poll(), 1)
+            self.assertTrue(tail.stree.b_pathOK(['/', 'a']))
+            journal.detach()
+
+        def stree_recovered(self):
+            journal     = C_streeJournal(self.str_base)
+            stree       = journal.stree_recover()
+            journal.detach()
+            return stree
+
+        def test_recoverReplaysTail(self):
+            journal     = C_streeJournal(self.str_base, batch = 2)
+            stree       = C_stree()
+            journal.attach(stree)
+            stree.mknode(['a', 'b'])
+            stree.cdnode('/a')
+            stree.touch('k', 1)
+            journal.checkpoint()
+            stree.mknode(['c'])
+            stree.touch('k', 2)
+            stree.node_hitCount(2)
+            journal.detach()
+            f = open(journal.str_journalFile(), 'ab')
+            f.write(struct.pack(str_recordHeader, 100) + 'partial')
+            f.close()
+            stree_recovered = self.stree_recovered()
+            self.assertEqual(stree_recovered.d_dump(), stree.d_dump())
+            self.assertEqual(stree_recovered.snode_find('/a').meta.hitCount(), 2)
+            self.assertEqual(self.stree_recovered().d_dump(), stree.d_dump())
+
+        def test_checkpointDuringBatchCommit(self):
+            journal     = C_streeJournal(self.str_base, checkpointEvery = 2)
+            stree       = C_stree()
+            journal.attach(stree)
+            stree.mknode(['a'])
+            stree.cdnode('/a')
+            with stree.batch():
+                for i in range(4): stree.node_hitCount(1)
+            journal.detach()
+            self.assertEqual(stree.snode_find('/a').meta.hitCount(), 4)
+            stree_recovered = self.stree_recovered()
+            self.assertEqual(stree_recovered.snode_find('/a').meta.hitCount(), 4)
+            self.assertEqual(stree_recovered.d_dump(), stree.d_dump())
+            tail        = C_streeJournalTail(self.str_base)
+            tail.poll()
+            self.assertEqual(tail.stree.d_dump(), stree.d_dump())
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,47 @@
+#!/usr/bin/env python
+"""
+    Regression tests for the preorder labels of C_stree on compressed
+    trees.
+"""
+
+import  os
+import  sys
+import  unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from    C_snode         import  *
+
+class test_labels(unittest.TestCase):
+
+        def stree_build(self):
+            stree       = C_stree()
+            stree.mknode_many(['/x/a/b/c/d', '/x/a/b/c/e', '/y', '/x/f/g/h'])
+            return stree
+
+        def d_edges(self, asnode, astr_path = '/'):
+            d_edge      = {astr_path: list(asnode.l_edge)}
+            for node, snode in asnode.d_nodes.items():
+                d_edge.update(self.d_edges(snode, '%s/%s' %
+                                           (astr_path.rstrip('/'), node)))
+            return d_edge
+
+        def test_compressedQueriesMatch(self):
+            stree_plain = self.stree_build()
+            stree       = self.stree_build()
+            self.assertTrue(stree.nodes_compress() > 0)
+            d_before    = self.d_edges(stree.snode_root)
+            l_paths     = stree_plain.lstr_preorder()
+            self.assertEqual(stree.lstr_preorder(), l_paths)
+            for str_path in l_paths + ['/x/a/zz', '/x/a/b/q']:
+                self.assertEqual(stree.t_label(str_path),
+                                 stree_plain.t_label(str_path))
+                for str_other in l_paths:
+                    self.assertEqual(stree.str_lca(str_path, str_other),
+                                     stree_plain.str_lca(str_path, str_other))
+            self.assertEqual(stree.lstr_subtree('/x/a/b'),
+                             stree_plain.lstr_subtree('/x/a/b'))
+            self.assertEqual(self.d_edges(stree.snode_root), d_before)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,40 @@
+#!/usr/bin/env python
+"""
+    Regression tests for C_streeOverlay.
+"""
+
+import  os
+import  sys
+import  unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from    C_snode         import  *
+from    C_streeOverlay  import  *
+
+class test_overlay(unittest.TestCase):
+
+        def test_readsLeaveCompressedBaseAlone(self):
+            stree_lower = C_stree()
+            stree_lower.mknode_many(['/x/y/z/w', '/v'])
+            stree_lower.cdnode('/x/y/z/w')
+            stree_lower.touch('k', 1)
+            stree_lower.cdnode('/')
+            self.assertTrue(stree_lower.nodes_compress() > 0)
+            snode       = stree_lower.snode_root.d_nodes['x']
+            l_edge      = list(snode.l_edge)
+            version     = snode._version
+            self.assertEqual(l_edge, ['x', 'y', 'z'])
+            overlay     = C_streeOverlay([stree_lower])
+            self.assertEqual(overlay.ls('/x/y'), (['z'], {}))
+            self.assertEqual(overlay.ls('/x'), (['y'], {}))
+            self.assertEqual(overlay.ls('/x/y/z/w'), ([], {'k': 1}))
+            overlay.cdnode('/x/y/z/w')
+            self.assertEqual(overlay.cat('k'), 1)
+            self.assertEqual(overlay.ls('/x/q'), ([], {}))
+            self.assertTrue(stree_lower.snode_root.d_nodes['x'] is snode)
+            self.assertEqual(snode.l_edge, l_edge)
+            self.assertEqual(snode._version, version)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,111 @@
+#!/usr/bin/env python
+"""
+    Regression tests for C_streePager.
+"""
+
+import  gc
+import  os
+import  sys
+import  shutil
+import  tempfile
+import  unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from    C_snode         import  *
+from    C_streePager    import  *
+
+class test_pager(unittest.TestCase):
+
+        def setUp(self):
+            self.str_dir    = tempfile.mkdtemp()
+            self.stree      = C_stree()
+            self.pager      = C_streePager(self.stree,
+                                           os.path.join(self.str_dir, 'pages'),
+                                           budget = 50)
+
+        def tearDown(self):
+            self.pager.detach()
+            self.assertEqual(os.listdir(self.str_dir), [])
+            shutil.rmtree(self.str_dir)
+
+        def test_budgetAfterBatch(self):
+            l_paths = ['/p%d/n%d' % (i % 20, i) for i in range(200)]
+            self.stree.mknode_many(l_paths)
+            self.stree.touch_many([(str_path, {'k': 1}) for str_path in l_paths])
+            self.assertTrue(self.pager.d_stats()['resident'] <= 50)
+            self.assertEqual(self.stree.cat_many(l_paths, 'k'), [1] * 200)
+
+        def test_budgetAfterRollback(self):
+            self.stree.mknode_many(['/p%d/n%d' % (i % 20, i) for i in range(200)])
+            try:
+                with self.stree.batch():
+                    for i in range(20):
+                        self.stree.cdnode('/p%d' % i)
+                        self.stree.touch('k', i)
+                    raise ValueError('abort')
+            except ValueError:
+                pass
+            self.assertTrue(self.pager.d_stats()['resident'] <= 50)
+
+        def test_spilledPathsLeaveIndex(self):
+            l_paths = ['/p%d/n%d' % (i % 20, i) for i in range(200)]
+            self.stree.mknode_many(l_paths)
+            self.assertTrue(self.pager.d_stats()['pagesOut'] > 0)
+            self.assertTrue(len(self.stree.s_allPaths) < 220)
+            self.assertTrue(len(self.stree.l_allPaths) < 221)
+            for str_path in l_paths:
+                self.assertTrue(self.stree.b_pathOK(self.stree.l_pathAbs(str_path)))
+            self.assertEqual(self.stree.mknode_many(l_paths), [False] * 200)
+            self.pager.detach()
+            self.assertEqual(len(self.stree.s_allPaths), 220)
+            self.assertEqual(len(self.stree.l_allPaths), 221)
+            self.assertEqual(sorted(self.stree.l_allPaths[1:]),
+                             sorted([['/', 'p%d' % i] for i in range(20)] +
+                                    [self.stree.l_pathAbs(p) for p in l_paths]))
+            self.pager  = C_streePager(self.stree,
+                                       os.path.join(self.str_dir, 'pages'))
+
+        def test_stubIsNotReadAsDict(self):
+            self.stree.mknode_many(['/p%d/n%d' % (i % 20, i) for i in range(200)])
+            str_key = self.pager.d_spilled.keys()[0]
+            snode   = self.pager.d_spilled[str_key][0]
+            stub    = snode.d_nodes
+            self.assertTrue(isinstance(stub, C_pagedNodes))
+            self.assertTrue(bool(stub))
+            d_copy  = {}
+            d_copy.update(stub)
+            self.assertEqual(len(d_copy), 10)
+            self.assertEqual(sorted(dict(stub).keys()), sorted(d_copy.keys()))
+            self.assertFalse(isinstance(snode.d_nodes, C_pagedNodes))
+
+        def test_unknownMutationRecounts(self):
+            self.stree.mknode_many(['/p%d/n%d' % (i % 5, i) for i in range(20)])
+            snode   = self.stree.snode_find('/p0')
+            self.stree.nodes_load([{'name': 'x%d' % i, 'data': {},
+                                    'printMetaData': None,
+                                    'meta': {'hitCount': 0, 'canInclude': [],
+                                             'mustInclude': [],
+                                             'mustNotInclude': []},
+                                    'nodes': []} for i in range(30)],
+                                  snode, ['/', 'p0'])
+            self.stree.mutation_notify('rename', ['/', 'p0'])
+            self.assertTrue(self.pager.d_stats()['resident'] <= 50)
+            self.assertEqual(self.pager.d_stats()['resident'],
+                             sum([l_page[1] for l_page in
+                                    self.pager.d_resident.values()]))
+            self.assertTrue(self.stree.b_pathOK(['/', 'p0', 'x29']))
+
+        def test_renderCacheDropsSpilledNodes(self):
+            self.stree.renderCache(1 << 24)
+            self.stree.mknode_many(['/p%d/n%d' % (i % 20, i) for i in range(400)])
+            str_tree    = str(self.stree)
+            gc.collect()
+            s_live      = set([id(t_entry[0]()) for t_entry in
+                               self.stree.cache_render.d_cache.values()
+                               if t_entry[0]() is not None])
+            self.assertTrue(len(s_live) < 100)
+            self.assertEqual(str(self.stree), str_tree)
+
+if __name__ == '__main__':
+    unittest.main()
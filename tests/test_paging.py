@@ -0,0 +1,33 @@
+#!/usr/bin/env python
+"""
+    Regression tests for the paged node listings of C_stree.
+"""
+
+import  os
+import  sys
+import  unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from    C_snode         import  *
+
+class test_paging(unittest.TestCase):
+
+        def test_missingCursorRaisesInEveryOrder(self):
+            for str_order in [None, 'sorted', 'insertion']:
+                stree   = C_stree(childOrder = str_order)
+                stree.mknode(['b1', 'a1', 'b2', 'a2'])
+                snode   = stree.snode_root
+                self.assertRaises(KeyError, stree.lstr_nodePage, snode,
+                                  cursor = 'zz')
+                self.assertRaises(KeyError, stree.lstr_nodePage, snode,
+                                  cursor = 'b0', prefix = 'b')
+                l_names = stree.lstr_nodePage(snode)
+                self.assertEqual(stree.lstr_nodePage(snode, cursor = l_names[0]),
+                                 l_names[1:])
+                l_b     = [name for name in l_names[1:] if name[0] == 'b']
+                self.assertEqual(stree.lstr_nodePage(snode, cursor = l_names[0],
+                                                     prefix = 'b'), l_b)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,55 @@
+#!/usr/bin/env python
+"""
+    Regression tests for the inherited node settings of C_stree.
+"""
+
+import  os
+import  sys
+import  shutil
+import  tempfile
+import  unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from    C_snode         import  *
+from    C_streeJournal  import  *
+
+class test_props(unittest.TestCase):
+
+        def test_metaSetIsJournaled(self):
+            str_dir     = tempfile.mkdtemp()
+            try:
+                str_base    = os.path.join(str_dir, 'tree')
+                journal     = C_streeJournal(str_base)
+                stree       = C_stree()
+                journal.attach(stree)
+                stree.mknode_many(['/a/b'])
+                stree.metaData_print(True)
+                stree.treeNode_metaSet('/a')
+                stree.metaData_print(False)
+                journal.detach()
+                stree_copy  = C_streeJournal(str_base).stree_recover()
+                self.assertEqual(stree_copy.snode_find('/a').b_printMetaData, True)
+                self.assertEqual(stree_copy.b_printMetaData, False)
+                self.assertEqual(stree_copy.b_metaDataPrint(['/', 'a', 'b']), True)
+            finally:
+                shutil.rmtree(str_dir)
+
+        def test_constraintStampPerTree(self):
+            stree1      = C_stree()
+            stree2      = C_stree()
+            for stree in [stree1, stree2]:
+                stree.mknode_many(['/a/b'])
+                stree.cdnode('/a')
+                stree.node_mustInclude(['x'])
+            self.assertEqual(stree1.t_constraints('/a/b'), (['x'], []))
+            stamp       = stree1._constraintStamp
+            stree2.node_mustNotInclude(['y'])
+            self.assertEqual(stree1._constraintStamp, stamp)
+            self.assertEqual(stree2.t_constraints('/a/b'), (['x'], ['y']))
+            stree1.cdnode('/a/b')
+            stree1.node_mustInclude(['z'])
+            self.assertEqual(stree1.t_constraints('/a/b'), (['x', 'z'], []))
+
+if __name__ == '__main__':
+    unittest.main()
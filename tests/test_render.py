@@ -0,0 +1,107 @@
+#!/usr/bin/env python
+"""
+    Regression tests for the render cache of C_stree.
+"""
+
+import  os
+import  sys
+import  unittest
+import  cStringIO
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from    C_snode         import  *
+
+class test_render(unittest.TestCase):
+
+        def setUp(self):
+            self.stree_plain    = C_stree()
+            self.stree_cached   = C_stree()
+            self.stree_cached.renderCache(1 << 20)
+            self.apply(lambda stree:
+                       stree.mknode_many(['/a/b/c', '/a/b/d', '/a/e', '/f/g']))
+
+        def apply(self, afunc):
+            for stree in [self.stree_plain, self.stree_cached]: afunc(stree)
+
+        def l_renders(self, astree):
+            '''
+            Return the str(), lstree() and lsmeta() renderings of the
+            tree, the latter at each node.
+            '''
+            l_render    = [str(astree)]
+            stdout      = sys.stdout
+            sys.stdout  = cStringIO.StringIO()
+            try:
+                for str_path in ['/', '/a', '/a/b', '/a/b/c', '/f']:
+                    if not astree.b_pathOK(astree.l_pathAbs(str_path)): continue
+                    l_render.append(astree.lstree(str_path))
+                    l_render.append(astree.lsmeta(str_path))
+            finally:
+                sys.stdout  = stdout
+            return l_render
+
+        def renders_check(self):
+            l_plain     = self.l_renders(self.stree_plain)
+            self.assertEqual(self.l_renders(self.stree_cached), l_plain)
+            # Rendered again, now from the cache
+            self.assertEqual(self.l_renders(self.stree_cached), l_plain)
+
+        def cd_apply(self, astr_path, afunc):
+            def cd_func(stree):
+                stree.cdnode(astr_path)
+                afunc(stree)
+                stree.cdnode('/')
+            self.apply(cd_func)
+
+        def test_cachedMatchesUncached(self):
+            self.renders_check()
+            self.assertTrue(self.stree_cached.cache_render.stats()['hits'] > 0)
+            self.cd_apply('/a/b/c', lambda stree: stree.touch('k', 1))
+            self.renders_check()
+            self.cd_apply('/a/b', lambda stree: stree.node_hitCount(3))
+            self.renders_check()
+            self.cd_apply('/a/e', lambda stree: stree.node_mustInclude(['x']))
+            self.renders_check()
+            self.cd_apply('/a/b', lambda stree: stree.mknode(['h']))
+            self.renders_check()
+            self.cd_apply('/a', lambda stree: stree.rmnode('e'))
+            self.renders_check()
+            self.apply(lambda stree: stree.tree_metaData_print(False))
+            self.renders_check()
+            self.apply(lambda stree: stree.treeNode_metaSet('/a/b'))
+            self.apply(lambda stree: stree.tree_metaData_print(True))
+            self.renders_check()
+            self.cd_apply('/a/b/d', lambda stree: stree.node_hitCount(0, True))
+            self.renders_check()
+
+        def test_cachedMatchesAfterRollback(self):
+            self.renders_check()
+            def batch_fail(stree):
+                try:
+                    with stree.batch():
+                        stree.cdnode('/a/b')
+                        stree.touch('k', 2)
+                        stree.node_hitCount(5)
+                        stree.mknode(['z'])
+                        stree.cdnode('/')
+                        stree.rmnode('f')
+                        raise ValueError('rollback')
+                except ValueError:
+                    pass
+            self.apply(batch_fail)
+            self.renders_check()
+
+        def test_cachedMatchesSharedAndCompressed(self):
+            self.apply(lambda stree: stree.mknode_many(['/x/p/q/r', '/y/p/q/r']))
+            self.apply(lambda stree: stree.subtrees_intern())
+            self.renders_check()
+            self.cd_apply('/x/p', lambda stree: stree.touch('k', 3))
+            self.renders_check()
+            self.apply(lambda stree: stree.nodes_compress())
+            self.renders_check()
+            self.cd_apply('/y/p/q', lambda stree: stree.touch('k', 4))
+            self.renders_check()
+
+if __name__ == '__main__':
+    unittest.main()
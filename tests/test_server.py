@@ -0,0 +1,72 @@
+#!/usr/bin/env python
+"""
+    Regression tests for C_streeServer.
+"""
+
+import  os
+import  sys
+import  socket
+import  struct
+import  shutil
+import  tempfile
+import  threading
+import  unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from    C_snode         import  *
+from    C_streeServer   import  *
+
+class test_server(unittest.TestCase):
+
+        def setUp(self):
+            self.str_dir    = tempfile.mkdtemp()
+            self.stree      = C_stree()
+            self.stree.mknode(['a'])
+            self.server     = C_streeServer(self.stree,
+                                            os.path.join(self.str_dir, 'sock'))
+            self.server.start()
+            self.socket     = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            self.socket.connect(os.path.join(self.str_dir, 'sock'))
+
+        def tearDown(self):
+            self.socket.close()
+            self.server.stop()
+            shutil.rmtree(self.str_dir)
+
+        def l_exchange(self, aobj):
+            message_send(self.socket, aobj)
+            return message_recv(self.socket)
+
+        def test_malformedRequests(self):
+            for request in [['pwd'], 'pwd', None, ['pwd', 1, [], {}],
+                            ['pwd', '/', {}, {}], ['pwd', '/', [], []],
+                            ['batch', '/', [['pwd']], {}]]:
+                l_response  = self.l_exchange(request)
+                self.assertEqual(l_response[0], 1)
+            str_payload = '[not json'
+            self.socket.sendall(struct.pack(str_messageHeader, len(str_payload)) +
+                                str_payload)
+            self.assertEqual(message_recv(self.socket)[0], 1)
+            self.assertEqual(self.l_exchange(['cdnode', '/', ['a'], {}]),
+                             [0, '/a'])
+
+        def test_discardWakesPoolWaiter(self):
+            client      = C_streeClient(os.path.join(self.str_dir, 'sock'),
+                                        poolSize = 1)
+            sock        = client.socket_get()
+            l_result    = []
+            thread      = threading.Thread(target = lambda:
+                                           l_result.append(client.request('pwd')))
+            thread.daemon = True
+            thread.start()
+            thread.join(0.2)
+            self.assertTrue(thread.is_alive())
+            client.socket_discard(sock)
+            thread.join(5)
+            self.assertFalse(thread.is_alive())
+            self.assertEqual(l_result, ['/'])
+            client.close()
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,66 @@
+#!/usr/bin/env python
+"""
+    Regression tests for C_streeStats.
+"""
+
+import  os
+import  sys
+import  shutil
+import  tempfile
+import  unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from    C_snode         import  *
+from    C_streeStats    import  *
+from    C_streePager    import  *
+
+class test_stats(unittest.TestCase):
+
+        def stree_build(self):
+            stree       = C_stree()
+            l_paths     = ['/a/n%d' % i for i in range(10)]
+            stree.mknode_many(l_paths)
+            stree.touch_many([(str_path, {'v': i})
+                              for i, str_path in enumerate(l_paths)])
+            stree.touch_many([('/a/n0', {'v': 'high'}),
+                              ('/a/n1', {'v': None}),
+                              ('/a/n2', {'v': True})])
+            return stree
+
+        def test_meanSkipsNonNumeric(self):
+            d_mean      = C_streeStats(self.stree_build()).d_mean('v')
+            self.assertTrue(d_mean['exact'])
+            self.assertEqual(d_mean['estimate'], sum(range(3, 10)) / 7.0)
+            self.assertEqual(d_mean['skipped'], 3)
+
+        def test_sampledMeanSkipsNonNumeric(self):
+            stats       = C_streeStats(self.stree_build(), exactBelow = 0,
+                                       samples = 200, seed = 1)
+            d_mean      = stats.d_mean('v')
+            self.assertFalse(d_mean['exact'])
+            self.assertTrue(3 <= d_mean['estimate'] <= 9)
+            self.assertTrue(0 < d_mean['skipped'] < 10)
+
+        def test_pagedTreeSizedInFull(self):
+            str_dir     = tempfile.mkdtemp()
+            try:
+                stree   = C_stree()
+                pager   = C_streePager(stree, os.path.join(str_dir, 'pages'),
+                                       budget = 100)
+                stree.mknode_many(['/p%d/n%d' % (i % 40, i) for i in range(2000)])
+                self.assertTrue(len(stree.l_allPaths) < 1000)
+                misses  = pager.d_stats()['misses']
+                stats   = C_streeStats(stree, exactBelow = 1000, samples = 50)
+                d_count = stats.d_count()
+                self.assertFalse(d_count['exact'])
+                self.assertTrue(pager.d_stats()['misses'] - misses <= 50)
+                self.assertEqual(C_streeStats(stree, exactBelow = 5000).d_count(),
+                                 {'estimate': 2041.0, 'low': 2041.0,
+                                  'high': 2041.0, 'exact': True})
+                pager.detach()
+            finally:
+                shutil.rmtree(str_dir)
+
+if __name__ == '__main__':
+        unittest.main()
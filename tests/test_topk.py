@@ -0,0 +1,142 @@
+#!/usr/bin/env python
+"""
+    Regression tests for C_indexedHeap and C_streeTopK.
+"""
+
+import  os
+import  sys
+import  random
+import  unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from    C_snode         import  *
+from    C_streeTopK     import  *
+
+class test_topk(unittest.TestCase):
+
+        def setUp(self):
+            self.random = random.Random(7)
+            self.stree  = C_stree()
+            self.stree.mknode_many(['/a%d/b%d/c%d' % (i % 4, i % 7, i)
+                                    for i in range(60)])
+            self.l_paths = [str_path for str_path in self.l_pathsAll()
+                            if str_path != '/']
+
+        def l_pathsAll(self):
+            l_paths     = []
+            l_stack     = [('/', self.stree.snode_root)]
+            while len(l_stack):
+                str_path, snode = l_stack.pop()
+                l_paths.append(str_path)
+                for node, child in snode.d_nodes.items():
+                    l_stack.append(('%s/%s' % (str_path.rstrip('/'), node), child))
+            return l_paths
+
+        def d_bruteForce(self, astr_field, a_depth):
+            '''
+            Walk the tree and return the weight of each ranked subtree.
+            '''
+            d_subtree   = {}
+            for str_path in self.l_pathsAll():
+                snode   = self.stree.snode_find(str_path)
+                if astr_field is None:  weight = snode.meta.hitCount()
+                else:   weight  = C_streeTopK.weight_value(
+                                        snode.d_data.get(astr_field))
+                l_path  = self.stree.l_pathAbs(str_path)
+                if a_depth is None:
+                    l_ranked    = [l_path[:depth]
+                                   for depth in range(1, len(l_path) + 1)]
+                elif len(l_path) > a_depth:
+                    l_ranked    = [l_path[:a_depth + 1]]
+                else:
+                    l_ranked    = []
+                for l_subtree in l_ranked:
+                    str_subtree = '/' + '/'.join(l_subtree[1:])
+                    d_subtree[str_subtree] = d_subtree.get(str_subtree, 0) + weight
+            return dict([(str_path, weight) for str_path, weight
+                         in d_subtree.items() if weight])
+
+        def topk_check(self, atopk, astr_field, a_depth):
+            d_subtree   = self.d_bruteForce(astr_field, a_depth)
+            l_weights   = sorted(d_subtree.values(), reverse = True)
+            for k in [1, 5, len(d_subtree) + 3]:
+                l_top   = atopk.l_top(k)
+                self.assertEqual([weight for str_path, weight in l_top],
+                                 l_weights[:k])
+                for str_path, weight in l_top:
+                    self.assertEqual(d_subtree[str_path], weight)
+
+        def hits_random(self, a_count):
+            for i in range(a_count):
+                self.stree.cdnode(self.random.choice(self.l_paths))
+                self.stree.node_hitCount(self.random.randint(1, 9))
+
+        def test_indexedHeap(self):
+            heap        = C_indexedHeap()
+            d_value     = {}
+            for i in range(2000):
+                key     = self.random.randint(0, 60)
+                if self.random.random() < 0.25:
+                    heap.remove(key)
+                    d_value.pop(key, None)
+                else:
+                    value   = self.random.randint(-50, 50)
+                    heap.update(key, value)
+                    d_value[key]    = value
+                self.assertEqual(len(heap), len(d_value))
+            for i in range(1, len(heap)):
+                self.assertTrue(heap.l_heap[(i - 1) // 2][0] >= heap.l_heap[i][0])
+            for key, i in heap.d_pos.items():
+                self.assertEqual(heap.l_heap[i][1], key)
+            l_top       = heap.l_top(10)
+            self.assertEqual([value for key, value in l_top],
+                             sorted(d_value.values(), reverse = True)[:10])
+            for key, value in l_top: self.assertEqual(d_value[key], value)
+
+        def test_hitCountTreeWide(self):
+            topk        = C_streeTopK(self.stree)
+            self.hits_random(200)
+            self.topk_check(topk, None, None)
+
+        def test_hitCountAtDepth(self):
+            self.hits_random(50)
+            for depth in [1, 2]:
+                topk    = C_streeTopK(self.stree, depth = depth)
+                self.hits_random(100)
+                self.topk_check(topk, None, depth)
+                topk.detach()
+
+        def test_fieldAtDepth(self):
+            topk        = C_streeTopK(self.stree, field = 'size', depth = 1)
+            for i in range(200):
+                self.stree.cdnode(self.random.choice(self.l_paths))
+                self.stree.touch('size', self.random.choice([0, 3, 8.5, 'x', True]))
+            self.topk_check(topk, 'size', 1)
+
+        def test_rmnode(self):
+            topk        = C_streeTopK(self.stree)
+            topk_depth  = C_streeTopK(self.stree, depth = 1)
+            self.hits_random(200)
+            self.stree.cdnode('/a1')
+            self.stree.rmnode('b3')
+            self.stree.cdnode('/')
+            self.stree.rmnode('a2')
+            self.topk_check(topk, None, None)
+            self.topk_check(topk_depth, None, 1)
+            self.assertFalse(('/', 'a2') in topk.heap)
+
+        def test_hitCountReset(self):
+            topk        = C_streeTopK(self.stree)
+            self.hits_random(200)
+            for str_path in self.l_paths[::3]:
+                self.stree.cdnode(str_path)
+                self.stree.node_hitCount(self.random.choice([0, 2]), True)
+            self.topk_check(topk, None, None)
+            for str_path in self.l_paths:
+                self.stree.cdnode(str_path)
+                self.stree.node_hitCount(0, True)
+            self.assertEqual(topk.l_top(5), [])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,135 @@
+#!/usr/bin/env python
+"""
+    Regression tests for the watch subscriptions of C_stree.
+"""
+
+import  os
+import  sys
+import  time
+import  shutil
+import  tempfile
+import  unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from    C_snode         import  *
+from    C_streeOverlay  import  *
+from    C_streeJournal  import  *
+
+class test_watch(unittest.TestCase):
+
+        def d_watches(self, astree, al_paths, **kwargs):
+            d_events    = {}
+            for str_path in al_paths:
+                d_events[str_path]  = []
+                astree.watch(str_path, d_events[str_path].extend, **kwargs)
+            return d_events
+
+        def test_rmnodeReachesRemovedSubtree(self):
+            stree       = C_stree()
+            stree.mknode_many(['/a/b/c/d', '/z'])
+            d_events    = self.d_watches(stree, ['/a', '/a/b', '/a/b/c/d', '/z'])
+            d_node      = self.d_watches(stree, ['/a/b'], subtree = False)
+            stree.cdnode('/a')
+            stree.rmnode('b')
+            stree.watch_flush()
+            t_event     = ('/a', 'rmnode', ('b',))
+            for str_path in ['/a', '/a/b', '/a/b/c/d']:
+                self.assertEqual(d_events[str_path], [t_event])
+            self.assertEqual(d_node['/a/b'], [t_event])
+            self.assertEqual(d_events['/z'], [])
+
+        def test_overlayWhiteoutNotifies(self):
+            stree_lower = C_stree()
+            stree_lower.mknode_many(['/p/q/r'])
+            overlay     = C_streeOverlay([stree_lower])
+            d_events    = self.d_watches(overlay.stree_upper, ['/p/q/r'])
+            self.assertTrue(overlay.rmnode('/p/q'))
+            overlay.stree_upper.watch_flush()
+            self.assertEqual(d_events['/p/q/r'], [('/p', 'rmnode', ('q',))])
+            self.assertFalse(overlay.b_pathOK(['/', 'p', 'q']))
+
+        def test_intervalDeliversLastBurst(self):
+            stree       = C_stree()
+            stree.mknode_many(['/a'])
+            l_events    = []
+            stree.watch('/a', l_events.extend)
+            stree.watch_interval(0.1)
+            stree.cdnode('/a')
+            for i in range(5): stree.touch('k', i)
+            f_deadline  = time.time() + 2
+            while time.time() < f_deadline and \
+                  ('/a', 'touch', ('k', 4)) not in l_events:
+                time.sleep(0.02)
+            self.assertEqual(l_events[-1], ('/a', 'touch', ('k', 4)))
+
+        def test_raisingCallbackKeepsOthers(self):
+            stree       = C_stree()
+            stree.mknode_many(['/a'])
+            l_events    = []
+
+            def callback_raise(al_events):
+                raise ValueError('callback')
+
+            stree.watch('/a', callback_raise)
+            stree.watch('/a', l_events.extend)
+            stree.watch('/', l_events.extend)
+            stree.watch_interval(60)
+            stree.cdnode('/a')
+            stree.touch('k', 1)
+            self.assertRaises(ValueError, stree.watch_flush)
+            self.assertEqual(len(l_events), 2)
+
+        def test_raisingCallbackKeepsLaterHooks(self):
+            str_dir     = tempfile.mkdtemp()
+            try:
+                stree   = C_stree()
+
+                def callback_raise(al_events):
+                    raise ValueError('callback')
+
+                stree.watch('/', callback_raise)
+                journal = C_streeJournal(os.path.join(str_dir, 'tree'))
+                journal.attach(stree)
+                stree.mknode(['a'])
+                self.assertEqual(journal._seq, 1)
+                with stree.batch():
+                    stree.mknode(['b', 'c'])
+                self.assertEqual(journal._seq, 2)
+                self.assertRaises(ValueError, stree.watch_flush)
+                stree.watch_flush()
+                journal.detach()
+            finally:
+                shutil.rmtree(str_dir)
+
+        def test_mknodeNotMergedPastRmnode(self):
+            stree       = C_stree()
+            l_events    = []
+            stree.watch('/', l_events.extend)
+            stree.watch_interval(100)
+            stree.mknode(['x'])
+            stree.rmnode('x')
+            stree.mknode(['y'])
+            stree.mknode(['p'])
+            stree.mknode_many(['/p/q'])
+            stree.rmnode('p')
+            stree.mknode_many(['/p/r'])
+            stree.watch_flush()
+            s_nodes     = set()
+            d_nodes     = {}
+            for str_path, str_verb, t_args in l_events:
+                if str_verb == 'mknode':
+                    for node in t_args[0]:
+                        s_nodes.add('%s/%s' % (str_path.rstrip('/'), node))
+                if str_verb == 'rmnode':
+                    str_removed = '%s/%s' % (str_path.rstrip('/'), t_args[0])
+                    s_nodes     = set([str_node for str_node in s_nodes
+                                       if str_node != str_removed and
+                                          not str_node.startswith(str_removed + '/')])
+            self.assertEqual(s_nodes, set(['/y', '/p', '/p/r']))
+            self.assertEqual(l_events[:3], [('/', 'mknode', (['x'],)),
+                                            ('/', 'rmnode', ('x',)),
+                                            ('/', 'mknode', (['y', 'p'],))])
+
+if __name__ == '__main__':
+    unittest.main()